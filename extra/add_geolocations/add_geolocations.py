@@ -3,69 +3,317 @@
 """
 Snippet to add country codes and regions to dataframe containing longitude and latitude data.  
 
-usage: add_geolocations.py [-h] -i INFILENAME -o OUTFILENAME -g OCEANSGEOMETRIES -j COUNTRYREGIONJSON
+usage: add_geolocations.py [-h] -i INFILENAME -o OUTFILENAME -g OCEANSGEOMETRIES -j COUNTRYREGIONJSON [-b COUNTRYBOUNDARIES] [--cc_column CC_COLUMN] [-c CACHE] [-p PRECISION] [--nominatim_fallback] [--nominatim_url NOMINATIM_URL] [--rate RATE] [--concurrency CONCURRENCY] [--checkpoint CHECKPOINT]
 """
 
+import os
+import sys
 import argparse
-import helpers
-import os.path
 
-def get_cc_from_coordinates(coordlist, ocean_gpkg):
-    """Get country codes from coordinate list via Nominatim and data on oceans.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "../../johnstonsarchive-nucleartest-reader"))
+
+import DataFrameFile
+
+def read_geometries(filename):
+    """Read file with names and geometries (e.g. .gpkg, .shp, .geojson) as geopandas dataframe in longitude/latitude (EPSG:4326)."""
+    import geopandas as gp
+
+    gdf = gp.read_file(filename)
+    if gdf.crs is not None and gdf.crs.to_epsg() != 4326:
+        gdf = gdf.to_crs(epsg=4326)
+    return gdf
+
+
+def get_matches(coordlist, gdf):
+    """Find the polygons that contain the coordinates, with one spatial join on all coordinates.
+    Parameters
+    ---------
+        coordlist : list of tuple 
+            list of coordinates as (latitude, longitude) 
+        gdf : geopandas dataframe
+            dataframe containing geometries, i.e. polygons
+    Returns
+    ---------
+        (point_indices, row_indices) : (np.ndarray, np.ndarray)
+            pairs of indices into coordlist and rows of gdf, one per polygon that contains a coordinate
+    """
+    import numpy as np
+    import shapely
+
+    if len(coordlist) == 0:
+        return (np.zeros(0, dtype=int), np.zeros(0, dtype=int))
+
+    points = shapely.points([coord[1] for coord in coordlist], [coord[0] for coord in coordlist])
+    geometries = np.asarray(gdf["geometry"].array, dtype=object)
+
+    # the tree gives the polygons whose bounding box contains a point, only these candidates are tested on the (prepared) polygons
+    tree = shapely.STRtree(geometries)
+    (point_indices, row_indices) = tree.query(points)
+    shapely.prepare(geometries)
+    inside = shapely.contains(geometries[row_indices], points[point_indices])
+    return (point_indices[inside], row_indices[inside])
+
+
+def get_oceans_from_coordinates(coordlist, seas_gdf, warn=True):
+    """Get ocean names from coordinate list with one spatial join on all coordinates.
     Parameters
     ---------
         coordlist : list of tuple 
             list of coordinates as (latitude, longitude) 
-        ocean_gpkg : geopandas dataframe
+        seas_gdf : geopandas dataframe
             dataframe containing oceans (names and geometries, i.e. polygons)
+        warn : bool
+            print a warning for each coordinate without or with more than one ocean
+    Returns
+    ---------
+        oceans : list of str 
+            ocean names with prefix "O_" (or None, if no or more than one ocean contains the coordinate)
+    """
+    import numpy as np
+
+    names = seas_gdf["name"].to_numpy()
+    (point_indices, sea_indices) = get_matches(coordlist, seas_gdf)
+    n_seas = np.bincount(point_indices, minlength=len(coordlist))
+
+    oceans = [None] * len(coordlist)
+    for (i, j) in zip(point_indices, sea_indices):
+        if n_seas[i] == 1:
+            oceans[i] = f"O_{names[j]}"
+    if warn:
+        for i in np.flatnonzero(n_seas == 0):
+            print(f"[WARNING] No location for {coordlist[i]}.")
+        for i in np.flatnonzero(n_seas > 1):
+            print(f"[ERROR] Found more than one matching ocean for {coordlist[i]}!")
+            print(f"{names[sea_indices[point_indices == i]]}")
+
+    return oceans
+
+
+def get_countries_from_coordinates(coordlist, countries_gdf, cc_column="ISO_A2_EH"):
+    """Get country codes from coordinate list with one spatial join on all coordinates.
+    Parameters
+    ---------
+        coordlist : list of tuple 
+            list of coordinates as (latitude, longitude) 
+        countries_gdf : geopandas dataframe
+            dataframe containing country boundaries (country codes and geometries, i.e. polygons)
+        cc_column : str
+            col of countries_gdf with the 2-digit country codes (e.g. ISO_A2_EH of Natural Earth); countries without valid code (e.g. -99) are skipped
     Returns
     ---------
         ccs : list of str 
-            country codes (or ocean names with prefix "O_")    
+            lower case country codes (or None, if the coordinate is in no country)
+        ambiguous : list of int
+            indices of the coordinates in more than one country, e.g. at disputed borders (their country code is None)
+    """
+    import numpy as np
+
+    assert cc_column in countries_gdf.columns, f"[ERROR] Col {cc_column} not in country boundaries, use one of {', '.join(countries_gdf.columns)}."
+    codes = countries_gdf[cc_column].astype(str).str.lower()
+    valid = codes.str.fullmatch("[a-z]{2}").to_numpy()
+    countries_gdf = countries_gdf[valid]
+    codes = codes[valid].to_numpy()
+
+    (point_indices, country_indices) = get_matches(coordlist, countries_gdf)
+    n_countries = np.bincount(point_indices, minlength=len(coordlist))
+
+    ccs = [None] * len(coordlist)
+    for (i, j) in zip(point_indices, country_indices):
+        if n_countries[i] == 1:
+            ccs[i] = codes[j]
+    return (ccs, [int(i) for i in np.flatnonzero(n_countries > 1)])
+
+
+class RateBudget:
+    """Global rate budget of the requests: however many are sent concurrently, they start at most rate times per second."""
+
+    def __init__(self, rate):
+        import asyncio
+
+        self.interval_ = 1/rate
+        self.next_start_ = 0.
+        self.lock_ = asyncio.Lock()
+
+    async def wait(self):
+        """Wait until the next request may start."""
+        import time
+        import asyncio
+
+        async with self.lock_:
+            now = time.monotonic()
+            start = max(now, self.next_start_)
+            self.next_start_ = start + self.interval_
+        await asyncio.sleep(start - now)
+
+
+def load_checkpoint(checkpointfile):
+    """Load Nominatim results written by get_cc_from_nominatim as dict[(LAT, LONG)] -> (CC, FULL_LOC), by exact coordinate. Unlike the geocode cache (see load_geocache), it only holds raw Nominatim answers, to resume an interrupted run."""
+    import json
+
+    done = {}
+    if checkpointfile is None or not os.path.isfile(checkpointfile):
+        return done
+    with open(checkpointfile, 'r') as f:
+        for line in f:
+            if line.strip() == "":
+                continue
+            entry = json.loads(line)
+            done[(entry["LAT"], entry["LONG"])] = (entry["CC"], entry["FULL_LOC"])
+    return done
+
+
+async def reverse_async(geolocator, coord, budget, max_retries):
+    """Reverse geocode one coordinate in a worker thread, within the rate budget. Returns the raw Nominatim location ({} if there is none), or None if all tries failed."""
+    import asyncio
+    from geopy.exc import GeocoderServiceError
+
+    for n_try in range(max_retries + 1):
+        await budget.wait()
+        try:
+            geolocs = await asyncio.to_thread(geolocator.reverse, coord)
+            return {} if geolocs is None else geolocs.raw
+        except GeocoderServiceError as e:
+            print(f"\n[WARNING] Request for {coord} failed ({e}){', retrying' if n_try < max_retries else ''}.")
+    return None
+
+
+async def reverse_all_async(coordlist, geolocator, rate, concurrency, checkpointfile, max_retries):
+    """Reverse geocode all coordinates with concurrency workers sharing one rate budget; each result is appended to the checkpoint file as soon as it arrives."""
+    import json
+    import asyncio
+
+    budget = RateBudget(rate)
+    queue = asyncio.Queue()
+    for i in range(len(coordlist)):
+        queue.put_nowait(i)
+    raws = [None] * len(coordlist)
+    n_finished = 0
+    checkpoint = None if checkpointfile is None else open(checkpointfile, 'a')
+
+    async def worker():
+        nonlocal n_finished
+        while not queue.empty():
+            i = queue.get_nowait()
+            raws[i] = await reverse_async(geolocator, coordlist[i], budget, max_retries)
+            if checkpoint is not None and raws[i] is not None:
+                cc = raws[i].get("address", {}).get("country_code")
+                checkpoint.write(json.dumps({"LAT": coordlist[i][0], "LONG": coordlist[i][1], "CC": cc, "FULL_LOC": raws[i] if cc is not None else None}) + "\n")
+                checkpoint.flush()
+            n_finished += 1
+            print(f'\r>> Processing... ({int(n_finished/len(coordlist)*100)}%)', end='')
+
+    try:
+        await asyncio.gather(*[worker() for _ in range(concurrency)])
+    finally:
+        if checkpoint is not None:
+            checkpoint.close()
+    return raws
+
+
+def get_cc_from_nominatim(coordlist, url=None, rate=1., concurrency=4, checkpointfile=None, max_retries=2):
+    """Get country codes from coordinate list via Nominatim, with concurrent requests within a global rate budget.
+    Parameters
+    ---------
+        coordlist : list of tuple 
+            list of coordinates as (latitude, longitude) 
+        url : str or None
+            url of the Nominatim server, e.g. http://localhost:8088 for a local one (see mock_nominatim.py); None for nominatim.openstreetmap.org
+        rate : float
+            maximal number of requests per second of all workers together (the public server allows 1)
+        concurrency : int
+            number of requests waiting for an answer at the same time
+        checkpointfile : str or None
+            json lines file each answer is appended to as soon as it arrives; coordinates already in it are not requested again, so an interrupted run resumes where it stopped
+        max_retries : int
+            number of retries of a failed request; coordinates still failing are not written to the checkpoint file
+    Returns
+    ---------
+        ccs : list of str 
+            country codes (or None, if Nominatim has none)    
         full_locations : list of dict
-            full locations from Nominatim (or None, if ocean)
+            full locations from Nominatim (or None, if no country code)
     """
+    import asyncio
+    import urllib.parse
     import geopy as gpy
-    import geopandas as gp
-    from geopy.extra.rate_limiter import RateLimiter
-    from shapely.geometry import Point
 
-    ccs = []
-    full_locations = []
+    coordlist = [ (float(coord[0]), float(coord[1])) for coord in coordlist ]
+    done = load_checkpoint(checkpointfile)
+    todo = [ coord for coord in dict.fromkeys(coordlist) if coord not in done ]
+    if len(done) > 0:
+        print(f"[INFO] Resuming from {checkpointfile}, {len(coordlist) - len(todo)} of {len(coordlist)} coordinates done.")
 
     # geopy for locations
-    geolocator = gpy.Nominatim(user_agent="myapp")
-    reverse = RateLimiter(geolocator.reverse, min_delay_seconds=1)
-
-    # for seas
-    seas_gdf = gp.read_file(ocean_gpkg)
-
-    for i, coord in enumerate(coordlist):
-        if (i%5==0):
-            print(f'\r>> Processing... ({int(i/len(coordlist)*100)}%)', end='')
-        geolocs = reverse(coord)
-
-        if geolocs is not None and "country_code" in geolocs.raw["address"]:
-            ccs += [ geolocs.raw["address"]["country_code"] ]
-            full_locations += [ geolocs.raw ]
-            continue
-        
-        full_locations += [None]
-
-        p = Point(coord[1], coord[0])
-        seas = seas_gdf[seas_gdf["geometry"].contains(p)]
-
-        if len(seas) == 0: 
-            print(f"[WARNING] No location for {coord}.")
-            ccs += [None]
-        elif len(seas) == 1:
-            ccs += [f"O_{seas["name"].iloc[0]}"]
-        else: 
-            print("[ERROR] Found more than one matching ocean!")
-            print(f"{seas["name"]}")
-            ccs += [None]
-    
-    print('\r>> Processing... (100%)')
+    if url is None:
+        geolocator = gpy.Nominatim(user_agent="myapp", timeout=10)
+    else:
+        parsed = urllib.parse.urlsplit(url)
+        geolocator = gpy.Nominatim(user_agent="myapp", timeout=10, domain=parsed.netloc + parsed.path.rstrip("/"), scheme=parsed.scheme)
+
+    if len(todo) > 0:
+        raws = asyncio.run(reverse_all_async(todo, geolocator, rate, concurrency, checkpointfile, max_retries))
+        print()
+        for (coord, raw) in zip(todo, raws):
+            if raw is not None and "country_code" in raw.get("address", {}):
+                done[coord] = (raw["address"]["country_code"], raw)
+            else:
+                done[coord] = (None, None)
+
+    ccs = [ done[coord][0] for coord in coordlist ]
+    full_locations = [ done[coord][1] for coord in coordlist ]
+    return (ccs, full_locations)
+
+
+def get_cc_from_coordinates(coordlist, ocean_gpkg, country_boundaries=None, cc_column="ISO_A2_EH", nominatim_fallback=False, nominatim_options=None):
+    """Get country codes from coordinate list via Nominatim (or country boundaries) and data on oceans.
+    Parameters
+    ---------
+        coordlist : list of tuple 
+            list of coordinates as (latitude, longitude) 
+        ocean_gpkg : str
+            file containing oceans (names and geometries, i.e. polygons)
+        country_boundaries : str or None
+            file containing country boundaries (e.g. Natural Earth Admin 0 countries); if given, countries are found offline with one spatial join instead of one Nominatim request per coordinate
+        cc_column : str
+            col of country_boundaries with the 2-digit country codes
+        nominatim_fallback : bool
+            with country_boundaries, ask Nominatim for the coordinates that are in more than one country or in neither a country nor an ocean
+        nominatim_options : dict or None
+            keyword arguments of get_cc_from_nominatim, e.g. {"url": "http://localhost:8088", "rate": 10}
+    Returns
+    ---------
+        ccs : list of str 
+            country codes (or ocean names with prefix "O_")    
+        full_locations : list of dict
+            full locations from Nominatim (or None, if ocean or found offline)
+    """
+    coordlist = list(coordlist)
+    if nominatim_options is None:
+        nominatim_options = {}
+
+    if country_boundaries is None:
+        (ccs, full_locations) = get_cc_from_nominatim(coordlist, **nominatim_options)
+        ambiguous = []
+    else:
+        (ccs, ambiguous) = get_countries_from_coordinates(coordlist, read_geometries(country_boundaries), cc_column)
+        full_locations = [None] * len(coordlist)
+        print(f"[INFO] Found countries of {sum(cc is not None for cc in ccs)} of {len(coordlist)} coordinates offline.")
+
+    # for seas, all coordinates without country at once
+    unresolved = [i for (i, cc) in enumerate(ccs) if cc is None and i not in ambiguous]
+    oceans = get_oceans_from_coordinates([coordlist[i] for i in unresolved], read_geometries(ocean_gpkg), warn=country_boundaries is None)
+    for (i, ocean) in zip(unresolved, oceans):
+        ccs[i] = ocean
+
+    if country_boundaries is not None:
+        ambiguous = sorted(ambiguous + [i for (i, ocean) in zip(unresolved, oceans) if ocean is None])
+        if nominatim_fallback and len(ambiguous) > 0:
+            print(f"[INFO] Asking Nominatim for {len(ambiguous)} ambiguous coordinates.")
+            for (i, cc, full_location) in zip(ambiguous, *get_cc_from_nominatim([coordlist[i] for i in ambiguous], **nominatim_options)):
+                (ccs[i], full_locations[i]) = (cc, full_location)
+        for i in ambiguous:
+            if ccs[i] is None:
+                print(f"[WARNING] No unique location for {coordlist[i]}.")
 
     return (ccs, full_locations)    
 
@@ -82,7 +330,9 @@ def get_regions_from_cc(cclist, jsonfile):
     region_cc_dict = make_region_dict(jsonfile, key="cc")
     regions = []
     for cc in cclist:
-        if cc[0:2]=="O_":
+        if not isinstance(cc, str): # no location found
+            regions += [None]
+        elif cc[0:2]=="O_":
             regions += [cc[2:]]
         else:
             regions += [region_cc_dict[cc.upper()]]
@@ -120,16 +370,69 @@ def make_region_dict(jsonfile, key="CC"):
     return region_dict
 
 
-def main(infilename, outfilename, country_region_json, oceansgeometries):
+def round_coord(coord, precision=3):
+    """Round coordinate (latitude, longitude) to the given number of decimals, as key of the geocode cache."""
+    return (round(float(coord[0]), precision), round(float(coord[1]), precision))
+
+
+def load_geocache(cachefile, precision=3):
+    """Load geocode cache written by append_geocache.
+    The cache keeps the final locations (CC, REGION and FULL_LOC) of rounded coordinates across runs and inputs, whatever looked them up (country boundaries, oceans or Nominatim), and is written at the end of a run. It differs from the checkpoint of get_cc_from_nominatim (see load_checkpoint), which keeps the raw Nominatim answers of exact coordinates as soon as they arrive, only to resume an interrupted run.
+    Parameters
+    ---------
+        cachefile : str
+            json lines file, one entry with LAT, LONG, CC, REGION and FULL_LOC per line; later entries of the same coordinate replace earlier ones
+        precision : int
+            number of decimals the coordinates are rounded to (entries written with more decimals are rounded again)
+    Returns
+    ---------
+        cache : dict
+            dict[(LAT, LONG)] -> dict with CC, REGION and FULL_LOC
+    """
+    import json
+
+    cache = {}
+    if not os.path.isfile(cachefile):
+        return cache
+    with open(cachefile, 'r') as f:
+        for line in f:
+            if line.strip() == "":
+                continue
+            entry = json.loads(line)
+            cache[round_coord((entry["LAT"], entry["LONG"]), precision)] = {descr: entry[descr] for descr in ["CC", "REGION", "FULL_LOC"]}
+    return cache
+
+
+def append_geocache(cachefile, entries):
+    """Append entries dict[(LAT, LONG)] -> dict with CC, REGION and FULL_LOC to the geocode cache (see load_geocache)."""
+    import json
+
+    with open(cachefile, 'a') as f:
+        for ((lat, long), entry) in entries.items():
+            f.write(json.dumps({"LAT": lat, "LONG": long, **entry}) + "\n")
+
+
+def main(infilename, outfilename, country_region_json, oceansgeometries, country_boundaries=None, cc_column="ISO_A2_EH", nominatim_fallback=False, cachefile=None, precision=3, nominatim_options=None):
     """Main. 
     Parameters
     ---------
         infilename : str 
-            filename of pickled pd.Dataframe with explosion locations
+            filename of pd.Dataframe with explosion locations (.parquet, .feather/.arrow or pickle, see DataFrameFile)
         outfilename : str
-            filename for pickled go.Figure
+            filename for the pd.Dataframe with geolocations, in the format given by its extension (parquet and Arrow files get FULL_LOC as json and no coords col, which is in LAT and LONG)
+        country_region_json, oceansgeometries : str
+            see make_region_dict and get_cc_from_coordinates
+        country_boundaries, cc_column, nominatim_fallback : 
+            offline lookup of countries, see get_cc_from_coordinates
+        cachefile : str or None
+            geocode cache (see load_geocache); only coordinates not in it are looked up, and their locations are added to it
+        precision : int
+            number of decimals of the coordinates as keys of the cache; coordinates that are the same after rounding share one entry, which is looked up with the first of them (without cache, only equal coordinates are looked up once)
+        nominatim_options : dict or None
+            keyword arguments of get_cc_from_nominatim (server, rate budget, concurrency, checkpoint file)
     """
-    
+    import json
+
     if not os.path.isfile(country_region_json):
         input(f"[WARNING] Json that connects states to regions does not exist. Will download it and save it as '{country_region_json}'. Press enter to continue...")
         import urllib.request
@@ -138,14 +441,43 @@ def main(infilename, outfilename, country_region_json, oceansgeometries):
             country_region_json
         )
 
-    df = helpers.load_pkl(infilename)
+    df = DataFrameFile.load_dataframe(infilename)
     df = df.drop(df[df.LAT.isnull()].index)
 
     df['coords'] = [ t for t in zip(df.LAT, df.LONG) ]
-    (df['CC'], df['FULL_LOC']) = get_cc_from_coordinates(df.coords, ocean_gpkg=oceansgeometries)
-    df['REGION'] = get_regions_from_cc(df['CC'], country_region_json)
+    # the rounded coordinates are only the keys of the cache, the coordinates looked up are the original ones
+    if cachefile is None:
+        keys = [ (float(lat), float(long)) for (lat, long) in df.coords ]
+    else:
+        keys = [ round_coord(coord, precision) for coord in df.coords ]
+    first_coords = {}
+    for (key, coord) in zip(keys, df.coords):
+        first_coords.setdefault(key, coord)
+
+    # every key only once (with the first of its coordinates), and only if it is not in the cache yet
+    cache = {} if cachefile is None else load_geocache(cachefile, precision)
+    new_keys = [ key for key in first_coords if key not in cache ]
+    print(f"[INFO] {len(first_coords)} different coordinates, {len(first_coords) - len(new_keys)} of them in cache.")
+
+    if len(new_keys) > 0:
+        (ccs, full_locations) = get_cc_from_coordinates([ first_coords[key] for key in new_keys ], ocean_gpkg=oceansgeometries, country_boundaries=country_boundaries, cc_column=cc_column, nominatim_fallback=nominatim_fallback, nominatim_options=nominatim_options)
+        regions = get_regions_from_cc(ccs, country_region_json)
+        new_entries = { key: {"CC": cc, "REGION": region, "FULL_LOC": full_location} for (key, cc, region, full_location) in zip(new_keys, ccs, regions, full_locations) }
+        cache.update(new_entries)
+        if cachefile is not None:
+            # coordinates without location are looked up again next time
+            append_geocache(cachefile, { key: entry for (key, entry) in new_entries.items() if entry["CC"] is not None })
 
-    helpers.save_pkl(df, outfilename)
+    df['CC'] = [ cache[key]["CC"] for key in keys ]
+    df['FULL_LOC'] = [ cache[key]["FULL_LOC"] for key in keys ]
+    df['REGION'] = [ cache[key]["REGION"] for key in keys ]
+
+    if DataFrameFile.is_columnar(outfilename):
+        # parquet and Arrow files need one type of scalars per col and do not keep the index: the coords are already in LAT and LONG, FULL_LOC is kept as json (Nominatim gives different keys for different places)
+        df = df.drop(columns="coords").reset_index(drop=True)
+        df['FULL_LOC'] = [ None if full_location is None else json.dumps(full_location) for full_location in df.FULL_LOC ]
+
+    DataFrameFile.save_dataframe(df, outfilename)
     print(f"[INFO] Saved dataframe as {outfilename}.")
 
 
@@ -153,9 +485,20 @@ if __name__ == "__main__":
 
     parser = argparse.ArgumentParser()
     parser.add_argument("-i", "--infilename", help="input data in pandas dataframe", required=True)
-    parser.add_argument("-o", "--outfilename", help="output file, either html or pkl format.", required=True)
+    parser.add_argument("-o", "--outfilename", help="output file (.parquet, .feather/.arrow or pkl)", required=True)
     parser.add_argument("-g", "--oceansgeometries", help="dataframe with ocean names and corresponding geometries as polygons. Can be obtained from Flanders Marine Institute (2021). Global Oceans and Seas, version 1. Available online at https://www.marineregions.org/. https://doi.org/10.14284/542", required=True)
     parser.add_argument("-j", "--countryregionjson", help="json that maps states to region. If file does not exist, it is downloaded.", required=True)
+    parser.add_argument("-b", "--countryboundaries", help="file with country boundaries as polygons (e.g. Admin 0 countries of Natural Earth, https://www.naturalearthdata.com/); if given, countries are found offline instead of via Nominatim", required=False)
+    parser.add_argument("--cc_column", help="col of the country boundaries with the 2-digit country codes", default="ISO_A2_EH")
+    parser.add_argument("-c", "--cache", help="json lines file to keep the locations (CC, REGION, FULL_LOC) of looked up coordinates in across runs and inputs; only coordinates not in it are looked up", required=False)
+    parser.add_argument("-p", "--precision", help="number of decimals the coordinates are rounded to as keys of the cache; coordinates that are the same after rounding share one entry", type=int, default=3)
+    parser.add_argument("--nominatim_fallback", help="with country boundaries, ask Nominatim for coordinates in more than one country or in neither a country nor an ocean", action="store_true")
+    parser.add_argument("--nominatim_url", help="url of the Nominatim server, e.g. http://localhost:8088 (see mock_nominatim.py); default nominatim.openstreetmap.org", required=False)
+    parser.add_argument("--rate", help="maximal number of Nominatim requests per second (the public server allows 1)", type=float, default=1.)
+    parser.add_argument("--concurrency", help="number of Nominatim requests waiting for an answer at the same time", type=int, default=4)
+    parser.add_argument("--checkpoint", help="json lines file each raw Nominatim answer is appended to as soon as it arrives, by exact coordinate; an interrupted run resumes from it (unlike the cache, which is written once all locations are found)", required=False)
     args = parser.parse_args()
 
-    main(args.infilename, args.outfilename, args.countryregionjson, args.oceansgeometries)
+    nominatim_options = {"url": args.nominatim_url, "rate": args.rate, "concurrency": args.concurrency, "checkpointfile": args.checkpoint}
+
+    main(args.infilename, args.outfilename, args.countryregionjson, args.oceansgeometries, args.countryboundaries, args.cc_column, args.nominatim_fallback, args.cache, args.precision, nominatim_options)
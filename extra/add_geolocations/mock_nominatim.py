@@ -0,0 +1,99 @@
+#!/usr/bin/env python3.13
+
+"""
+Local mock of the Nominatim reverse geocoding server, to try add_geolocations.py (--nominatim_url http://localhost:PORT) without network and without the rate limit of the public server. Answers /reverse requests with the country of a few boxes around test sites (or no country outside of them) after a given latency; a part of the requests can fail to try retries.
+
+usage: mock_nominatim.py [-h] [-p PORT] [-l LATENCY] [-f FAIL_RATE]
+"""
+
+import json
+import time
+import random
+import argparse
+import urllib.parse
+import http.server
+
+
+# (country code, country, lat min, lat max, long min, long max)
+BOXES = [
+    ("us", "United States", 24., 50., -125., -66.),
+    ("kz", "Kazakhstan", 40., 56., 46., 88.),
+    ("ru", "Russia", 56., 82., 28., 180.),
+    ("kp", "North Korea", 37.5, 43., 124., 131.),
+    ("cn", "China", 18., 54., 73., 135.),
+    ("dz", "Algeria", 19., 37., -9., 12.),
+    ("au", "Australia", -44., -10., 112., 154.),
+    ("in", "India", 6., 36., 68., 98.),
+    ("pk", "Pakistan", 23., 37., 60., 78.),
+]
+
+
+def get_location(lat, long):
+    """Mock answer of Nominatim for a coordinate: the first box that contains it, or the error Nominatim gives for the sea."""
+    for (cc, country, lat_min, lat_max, long_min, long_max) in BOXES:
+        if lat_min <= lat <= lat_max and long_min <= long <= long_max:
+            return {"place_id": 0, "lat": str(lat), "lon": str(long), "display_name": country, "address": {"country": country, "country_code": cc}}
+    return {"error": "Unable to geocode"}
+
+
+class MockNominatimHandler(http.server.BaseHTTPRequestHandler):
+
+    latency = 0.
+    fail_rate = 0.
+
+    def do_GET(self):
+        url = urllib.parse.urlsplit(self.path)
+        params = urllib.parse.parse_qs(url.query)
+        time.sleep(self.latency)
+
+        if url.path.rstrip("/") != "/reverse" or "lat" not in params or "lon" not in params:
+            self.send_error(400)
+            return
+        if random.random() < self.fail_rate:
+            self.send_error(503)
+            return
+
+        body = json.dumps(get_location(float(params["lat"][0]), float(params["lon"][0]))).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main(port, latency, fail_rate):
+    """
+    Runs the mock server until interrupted.
+
+    Parameters
+    ---------
+    port : int
+        port to listen on (localhost)
+    latency : float
+        seconds each answer takes
+    fail_rate : float
+        share of requests answered with an error (503)
+    """
+    MockNominatimHandler.latency = latency
+    MockNominatimHandler.fail_rate = fail_rate
+    server = http.server.ThreadingHTTPServer(("localhost", port), MockNominatimHandler)
+    print(f"[INFO] Mock Nominatim on http://localhost:{port}.")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-p", "--port", help="port to listen on", type=int, default=8088)
+    parser.add_argument("-l", "--latency", help="seconds each answer takes", type=float, default=0.5)
+    parser.add_argument("-f", "--fail_rate", help="share of requests answered with an error", type=float, default=0.)
+
+    args = parser.parse_args()
+
+    main(args.port, args.latency, args.fail_rate)
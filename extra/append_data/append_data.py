@@ -1,26 +1,35 @@
 #!/usr/bin/env python3.13
 
+import os
+import sys
 import argparse
-import pickle
 import yaml
 
-import pandas as pd
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "../../johnstonsarchive-nucleartest-reader"))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "../export_data"))
 
-def main(infilename, appendfilename, outfilename, delete_state=None):
+import DataCollector
+import DataFrameFile
+import to_sqlite
+
+def main(infilename, appendfilename, outfilename, delete_state=None, sqlitefilename=None):
     """
     Adds data to the read-in data and saves the result. 
 
     Parameters
     ---------
     infilename : str 
-        Filename of pickled pd.Dataframe. 
+        Filename of pd.Dataframe (.parquet, .feather/.arrow or pickle, see DataFrameFile). 
     appendfilename: str
         Filename of yaml with data to be added. 
     outputfilename : str 
-        Filename to save the output pickle to.
+        Filename to save the output to, in the format given by its extension.
+    delete_state : str or None
+        If given, all rows of this state are removed before the data is added.
+    sqlitefilename : str or None
+        If given, the SQLite database (see to_sqlite.py) is updated as well: the rows of delete_state are removed and the added rows are inserted, or updated if a test with the same STATE and ID is already in it. The other rows are not written again.
     """
-    pkl_file = open(infilename, 'rb')
-    df = pickle.load(pkl_file)
+    df = DataFrameFile.load_dataframe(infilename)
     
     if delete_state is not None:
         df.drop(df[df.STATE==delete_state].index, inplace=True)
@@ -37,26 +46,33 @@ def main(infilename, appendfilename, outfilename, delete_state=None):
             else:
                 new_data_dict[cat] += [ new_data['data'][test][cat] ]
 
-    df_new = pd.DataFrame(new_data_dict)
-    df = pd.concat([df, df_new], ignore_index=True)
-    
-    df.reset_index(drop = True, inplace = True)
+    # one common dtype per col, e.g. CRAT_occured stays boolean although the new data does not have it
+    data = DataCollector.DataCollector()
+    data.add_dataframe(df)
+    data.add_columns(new_data_dict)
+    n_rows = len(df)
+    df = data.get_dataframe()
+
+    DataFrameFile.save_dataframe(df, outfilename)
 
-    output = open(outfilename, 'wb')
-    pickle.dump(df, output)
-    output.close()
+    if sqlitefilename is not None:
+        if delete_state is not None:
+            to_sqlite.delete_state_sqlite(sqlitefilename, delete_state)
+        to_sqlite.upsert_sqlite(df.iloc[n_rows:], sqlitefilename)
+        print(f"[INFO] Upserted {len(df) - n_rows} rows into {sqlitefilename}.")
 
     
 if __name__ == "__main__":
 
     parser = argparse.ArgumentParser()
-    parser.add_argument("-i", "--infilename", help="pickled pd.Dataframe containing nuclear tests from johnston archive", required=True)
+    parser.add_argument("-i", "--infilename", help="pd.Dataframe (.parquet, .feather/.arrow or pickle) containing nuclear tests from johnston archive", required=True)
     parser.add_argument("-a", "--appendfilename", help="yaml with data to append", required=True)
-    parser.add_argument("-o", "--outfilename", help="resulting pickled pd.Dataframe", required=True)
+    parser.add_argument("-o", "--outfilename", help="resulting pd.Dataframe (.parquet, .feather/.arrow or pickle)", required=True)
     parser.add_argument("-d", "--delete_state", help="if you would like to delete some state from existing dataset", required=False)
+    parser.add_argument("-s", "--sqlite", help="SQLite database written by to_sqlite.py to update with the added rows", required=False)
 
     args = parser.parse_args()
 
-    main(args.infilename, args.appendfilename, args.outfilename, args.delete_state)
+    main(args.infilename, args.appendfilename, args.outfilename, args.delete_state, args.sqlite)
 
 
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3.13
+
+"""
+Benchmark for collecting many tables into one dataframe: growing it with pd.concat in a loop (old) vs. DataCollector (new), on synthetic tables scaled up to 100k rows.
+
+usage: bench_collect.py [-h] [-r ROWS_PER_TABLE] [-m MAX_ROWS] [-n REPEAT]
+"""
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+import helpers
+
+
+def make_synthetic_table(n_rows, rng):
+    """Table with the kinds of cols the reader produces: ints, floats with NaN, strings with None, bools, datetimes."""
+    cols = {}
+    for j in range(3):
+        cols[f"INT{j}"] = rng.integers(0, 2000, n_rows)
+    for j in range(11):
+        values = rng.random(n_rows)
+        values[rng.random(n_rows) < 0.3] = np.nan
+        cols[f"FLOAT{j}"] = values
+    for j in range(27):
+        values = np.array([f"s{k}" for k in rng.integers(0, 50, n_rows)], dtype=object)
+        values[rng.random(n_rows) < 0.5] = None
+        cols[f"STR{j}"] = values
+    for j in range(2):
+        cols[f"BOOL{j}"] = rng.random(n_rows) < 0.5
+    cols["DATETIME"] = np.datetime64("1945-07-16") + rng.integers(0, 10**9, n_rows).astype("timedelta64[s]")
+    return cols
+
+
+def collect_with_concat(tables):
+    for i, cols in enumerate(tables):
+        if i==0:
+            data = pd.DataFrame(cols)
+        else: 
+            data = pd.concat([data, pd.DataFrame(cols)])
+    data.reset_index(drop = True, inplace = True)
+    return data
+
+
+def collect_with_collector(tables):
+    data = helpers.DataCollector.DataCollector()
+    for cols in tables:
+        data.add_columns(cols)
+    return data.get_dataframe()
+
+
+def main(rows_per_table, max_rows, repeat):
+    """
+    Runs the benchmark for doubling total numbers of rows up to max_rows and prints the timings.
+
+    Parameters
+    ---------
+    rows_per_table : int
+        rows of each synthetic table
+    max_rows : int
+        largest total number of rows
+    repeat : int
+        number of runs per timing; fastest is reported
+    """
+    rng = np.random.default_rng(42)
+    table = make_synthetic_table(rows_per_table, rng)
+
+    n_rows_list = []
+    n_rows = max_rows
+    while n_rows >= 8 * rows_per_table:
+        n_rows_list = [n_rows] + n_rows_list
+        n_rows //= 2
+
+    print(f"{'rows':>8} {'tables':>7} {'pd.concat [s]':>14} {'us/row':>7} {'collector [s]':>14} {'us/row':>7}")
+    for n_rows in n_rows_list:
+        tables = [table] * (n_rows // rows_per_table)
+        t_old = helpers.best_of(lambda: collect_with_concat(tables), repeat)
+        t_new = helpers.best_of(lambda: collect_with_collector(tables), repeat)
+        n = len(tables) * rows_per_table
+        print(f"{n:>8} {len(tables):>7} {t_old:>14.3f} {t_old/n*1e6:>7.2f} {t_new:>14.3f} {t_new/n*1e6:>7.2f}")
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-r", "--rows_per_table", help="rows of each synthetic table", type=int, default=200)
+    parser.add_argument("-m", "--max_rows", help="largest total number of rows", type=int, default=100000)
+    parser.add_argument("-n", "--repeat", help="number of runs per timing", type=int, default=3)
+
+    args = parser.parse_args()
+
+    main(args.rows_per_table, args.max_rows, args.repeat)
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3.13
+
+"""
+Benchmark for loading the output dataframe: unpickling it as a whole (old) vs. reading all or only some cols from parquet and Arrow files (new, see DataFrameFile). The dataframe is repeated to scale it up to more rows.
+
+usage: bench_load_dataframe.py [-h] [-i INFILENAME] [-c COLUMNS] [-s SCALE] [-n REPEAT]
+"""
+
+import os
+import argparse
+import tempfile
+
+import pandas as pd
+
+import helpers
+
+DataFrameFile = helpers.DataFrameFile
+
+
+def main(infilename, columns, scale, repeat):
+    """
+    Runs the benchmark and prints the timings and file sizes.
+
+    Parameters
+    ---------
+    infilename : str
+        dataframe written by read_johnston_data.py
+    columns : list of str
+        cols to read for the projected timings
+    scale : int
+        number of times the dataframe is repeated
+    repeat : int
+        number of runs per timing; fastest is reported
+    """
+    df = DataFrameFile.load_dataframe(infilename)
+    df = pd.concat([df] * scale, ignore_index=True)
+
+    print(f"[INFO] {len(df)} rows, {len(df.columns)} cols, projection on {len(columns)} cols.")
+    print(f"{'format':>8} {'size [kB]':>10} {'all cols [ms]':>14} {'projected [ms]':>15}")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for extension in [".pkl", ".parquet", ".arrow"]:
+            filename = os.path.join(tmpdir, f"data{extension}")
+            DataFrameFile.save_dataframe(df, filename)
+            t_all = helpers.best_of(lambda: DataFrameFile.load_dataframe(filename), repeat)
+            t_cols = helpers.best_of(lambda: DataFrameFile.load_dataframe(filename, columns=columns), repeat)
+            print(f"{extension:>8} {os.path.getsize(filename)/1024:10.0f} {t_all*1e3:14.2f} {t_cols*1e3:15.2f}")
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-i", "--infilename", help="dataframe to load (.parquet, .feather/.arrow or pickle)", default="../../obtained_data/johnstonarchive_nucleartests_dataframe.pkl")
+    parser.add_argument("-c", "--columns", help="comma separated cols for the projected timings", default="ID,STATE,DATETIME,LAT,LONG,YIELD")
+    parser.add_argument("-s", "--scale", help="number of times the dataframe is repeated", type=int, default=1)
+    parser.add_argument("-n", "--repeat", help="number of runs per timing", type=int, default=5)
+
+    args = parser.parse_args()
+
+    main(args.infilename, args.columns.split(","), args.scale, args.repeat)
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3.13
+
+"""
+Benchmark for the ocean lookup of add_geolocations.py: testing every point against all ocean polygons (old) vs. one spatial join with an STRtree and prepared polygons (new, get_oceans_from_coordinates). Without a gpkg file, synthetic oceans (a grid of polygons with many vertices) are used.
+
+usage: bench_ocean_lookup.py [-h] [-g OCEANSGEOMETRIES] [-p POINTS] [-v VERTICES] [-n REPEAT]
+"""
+
+import os
+import sys
+import argparse
+
+import numpy as np
+
+import helpers
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "../add_geolocations"))
+
+import add_geolocations
+
+
+def make_synthetic_oceans(vertices):
+    """Grid of 18x9 round polygons with the given number of vertices each, as geopandas dataframe with cols name and geometry."""
+    import geopandas as gp
+    import shapely
+
+    centers = [(lon, lat) for lon in range(-170, 180, 20) for lat in range(-80, 90, 20)]
+    geometries = [shapely.Point(center).buffer(9.5, quad_segs=max(vertices//4, 1)) for center in centers]
+    return gp.GeoDataFrame({"name": [f"Ocean {i}" for i in range(len(centers))]}, geometry=geometries, crs="EPSG:4326")
+
+
+def lookup_linear(coordlist, seas_gdf):
+    """Old lookup: each point against all polygons."""
+    from shapely.geometry import Point
+
+    oceans = []
+    for coord in coordlist:
+        seas = seas_gdf[seas_gdf["geometry"].contains(Point(coord[1], coord[0]))]
+        oceans += [f"O_{seas["name"].iloc[0]}" if len(seas) == 1 else None]
+    return oceans
+
+
+def main(oceansgeometries, n_points, vertices, repeat):
+    """
+    Runs the benchmark and prints the timings.
+
+    Parameters
+    ---------
+    oceansgeometries : str or None
+        gpkg file with ocean names and geometries; None for synthetic oceans
+    n_points : int
+        number of random coordinates to look up
+    vertices : int
+        number of vertices per synthetic polygon
+    repeat : int
+        number of runs per timing; fastest is reported
+    """
+    import geopandas as gp
+
+    seas_gdf = make_synthetic_oceans(vertices) if oceansgeometries is None else gp.read_file(oceansgeometries)
+    rng = np.random.default_rng(0)
+    coordlist = list(zip(rng.uniform(-90, 90, n_points), rng.uniform(-180, 180, n_points)))
+
+    # the lookup prints a warning per point without ocean
+    with open(os.devnull, 'w') as devnull:
+        stdout = sys.stdout
+        sys.stdout = devnull
+        assert lookup_linear(coordlist, seas_gdf) == add_geolocations.get_oceans_from_coordinates(coordlist, seas_gdf), "[ERROR] Lookups differ."
+        t_linear = helpers.best_of(lambda: lookup_linear(coordlist, seas_gdf), repeat)
+        t_tree = helpers.best_of(lambda: add_geolocations.get_oceans_from_coordinates(coordlist, seas_gdf), repeat)
+        sys.stdout = stdout
+
+    print(f"[INFO] {n_points} points, {len(seas_gdf)} oceans.")
+    print(f"{'lookup':>8} {'time [ms]':>10}")
+    print(f"{'linear':>8} {t_linear*1e3:10.2f}")
+    print(f"{'STRtree':>8} {t_tree*1e3:10.2f}")
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-g", "--oceansgeometries", help="gpkg file with ocean names and geometries (e.g. Global Oceans and Seas of marineregions.org); default synthetic oceans", required=False)
+    parser.add_argument("-p", "--points", help="number of random coordinates", type=int, default=500)
+    parser.add_argument("-v", "--vertices", help="number of vertices per synthetic polygon", type=int, default=20000)
+    parser.add_argument("-n", "--repeat", help="number of runs per timing", type=int, default=3)
+
+    args = parser.parse_args()
+
+    main(args.oceansgeometries, args.points, args.vertices, args.repeat)
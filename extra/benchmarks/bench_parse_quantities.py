@@ -0,0 +1,168 @@
+#!/usr/bin/env python3.13
+
+"""
+Benchmark for parsing the VENT, CRAT, YIELD and YD-EST cols of JohnstonarchiveReader: per-row find/replace chains (old) vs. the regex grammar applied to whole cols (new). Runs on the tables of one state, by default the USSR, where these cols are filled most.
+
+usage: bench_parse_quantities.py [-h] [-y YAMLDIR] [-d HTMLDIR] [-s STATE] [-n REPEAT]
+"""
+
+import io
+import argparse
+import contextlib
+
+import pandas as pd
+
+import helpers
+
+
+def prepare(reader):
+    """Runs read_data up to the parsing stages and returns a copy of the data."""
+    JohnstonarchiveReader = helpers.JohnstonarchiveReader
+    cols = JohnstonarchiveReader.slice_fixed_width_columns(reader.decoded_body_, [par_dict["indices"] for par_dict in reader.col_parameters_.values()])
+    reader.data_ = JohnstonarchiveReader.make_empty_array(len(reader.decoded_body_), reader.get_output_descr())
+    for descr, col in zip(reader.col_parameters_, cols):
+        reader.data_[f"{descr}_orig" if descr in JohnstonarchiveReader.PARSED_COLS else descr] = col
+    reader.clean_typos_and_column_spillovers()
+    return reader.data_.copy()
+
+
+def parse_per_row(reader):
+    """Old parsing: loops over every row of each col."""
+    for d in reader.data_:
+        d["YIELD_value_remark"] = None
+        if reader.apply_value_correction(d, "YIELD"):
+            continue
+        try:
+            d["YIELD"] = None if d["YIELD_orig"] in [None, ""] else float(d["YIELD_orig"])
+        except ValueError:
+            assert False, f"=========> ERROR! With ID {d['ID']} and YIELD: {d['YIELD_orig']}"
+    reader.data_["YIELD_orig"] = reader.data_["YIELD_orig"].astype(str)
+
+    for d in reader.data_:
+        d["YD-EST_value_remark"] = None
+        if reader.apply_value_correction(d, "YD-EST"):
+            continue
+        if d["YD-EST_orig"] in [None, ""]:
+            d["YD-EST"] = None
+        elif d["YD-EST_orig"].find("<") > -1:
+            d["YD-EST_value_remark"] = "<"
+            d["YD-EST"] = float(d["YD-EST_orig"].replace("<", ""))
+        else:
+            d["YD-EST"] = float(d["YD-EST_orig"])
+
+    for d in reader.data_:
+        crat = d["CRAT_orig"]
+        d["CRAT_value_remark"] = None
+        if reader.apply_value_correction(d, "CRAT"):
+            continue
+        if crat in ["", None]:
+            d["CRAT_occured"] = False
+            d["CRAT"] = None
+            continue
+        if crat.find("C") > -1:
+            d["CRAT_occured"] = True
+            crat = crat.replace("C", "")
+            if crat.strip() == "":
+                d["CRAT"] = None
+                continue
+        if crat.find("?") > -1:
+            d["CRAT_occured"] = False
+            crat = crat.replace("?", "")
+            if crat.strip() == "":
+                d["CRAT"] = None
+                d["CRAT_value_remark"] = '?'
+                continue
+        d["CRAT"] = float(crat)
+        if d["CRAT"] > 0:
+            d["CRAT_occured"] = True
+
+    for d in reader.data_:
+        vent = d["VENT_orig"]
+        d["VENT_value_remark"] = None
+        if reader.apply_value_correction(d, "VENT"):
+            continue
+        if vent in ["", None]:
+            d["VENT_occured"] = False
+            d["VENT"] = None
+            continue
+        if vent.find("V") > -1:
+            d["VENT_occured"] = True
+            vent = vent.replace("V", "")
+            if vent.strip() == "":
+                d["VENT"] = None
+                continue
+        vent = vent.replace("Ci", "")
+        f = 1
+        if vent.find("k") > -1:
+            (vent, f) = (vent.replace("k", ""), 1000)
+        elif vent.find("M") > -1:
+            (vent, f) = (vent.replace("M", ""), 1e6)
+        if vent.find("<") > -1:
+            (vent, d["VENT_value_remark"]) = (vent.replace("<", ""), "<")
+        elif vent.find(">") > -1:
+            (vent, d["VENT_value_remark"]) = (vent.replace(">", ""), ">")
+        d["VENT"] = f * float(vent)
+
+
+def parse_vectorized(reader):
+    """New parsing: the parsing stages of read_data."""
+    reader.fix_yield_values()
+    reader.fix_est_yield_values()
+    reader.add_crat_bool_and_values()
+    reader.add_vent_bool_and_values()
+
+
+def main(yamldir, htmldir, state, repeat):
+    """
+    Runs the benchmark and prints the timings.
+
+    Parameters
+    ---------
+    yamldir : str
+        folder with the *_tables.yml files
+    htmldir : str
+        folder with the archived html files
+    state : str
+        state of the tables to run on
+    repeat : int
+        number of runs per timing; fastest is reported
+    """
+    readers = [r for r in helpers.make_local_readers(yamldir, htmldir) if r.statename_ == state]
+    assert len(readers) > 0, f"[ERROR] No tables of state {state}."
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        prepared = [(r, prepare(r)) for r in readers]
+
+    def run(parse):
+        with contextlib.redirect_stdout(io.StringIO()):
+            for (r, data) in prepared:
+                r.data_ = data.copy()
+                parse(r)
+        return [r.data_.copy() for (r, _) in prepared]
+
+    for (old, new) in zip(run(parse_per_row), run(parse_vectorized)):
+        for descr in ["YIELD", "YD-EST", "CRAT", "VENT", "CRAT_occured", "VENT_occured", "YIELD_value_remark", "YD-EST_value_remark", "CRAT_value_remark", "VENT_value_remark"]:
+            assert pd.Series(old[descr]).equals(pd.Series(new[descr])), f"[ERROR] Different output for {descr}"
+
+    n_rows = sum(len(data) for (_, data) in prepared)
+    n_given = sum((~pd.isna(data[f"{descr}_orig"])).sum() for (_, data) in prepared for descr in ["YIELD", "YD-EST", "CRAT", "VENT"])
+
+    t_old = helpers.best_of(lambda: run(parse_per_row), repeat)
+    t_new = helpers.best_of(lambda: run(parse_vectorized), repeat)
+
+    print(f"[INFO] {len(readers)} tables of {state}, {n_rows} rows, {n_given} filled YIELD/YD-EST/CRAT/VENT entries.")
+    print(f"parsing per row    : {t_old*1e3:8.2f} ms")
+    print(f"parsing vectorized : {t_new*1e3:8.2f} ms  (x{t_old/t_new:.1f})")
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-y", "--yamldir", help="folder with yaml settings", default="../../johnstonsarchive-nucleartest-reader/yaml")
+    parser.add_argument("-d", "--htmldir", help="folder with archived html tables", default="../../obtained_data/johnston_original_html")
+    parser.add_argument("-s", "--state", help="state of the tables to run on", default="USSR")
+    parser.add_argument("-n", "--repeat", help="number of runs per timing", type=int, default=5)
+
+    args = parser.parse_args()
+
+    main(args.yamldir, args.htmldir, args.state, args.repeat)
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3.13
+
+"""
+Benchmark for JohnstonarchiveReader.read_data on the archived html tables: col slicing with a per-cell loop (old) vs. vectorized slicing (new), reading and slicing the decoded file vs. the memory-mapped file, time of the full read_data, and its peak memory.
+
+usage: bench_read_data.py [-h] [-y YAMLDIR] [-d HTMLDIR] [-n REPEAT]
+"""
+
+import io
+import argparse
+import tracemalloc
+import contextlib
+
+import numpy as np
+
+import helpers
+
+
+def slice_per_cell(reader):
+    """Old slicing: loops over every line and every col."""
+    data = [ [0 for _ in reader.col_parameters_] for j in reader.decoded_body_ ]
+    for i, line in enumerate(reader.decoded_body_):
+        for j, (descr, par_dict) in enumerate(reader.col_parameters_.items()):
+            value = line[ par_dict["indices"][0]:par_dict["indices"][1] ]
+            if value.strip() == "":
+                data[i][j] = None
+            else: 
+                data[i][j] = value.strip()
+    dt = [ (n, 'object') for n in reader.col_parameters_]
+    return np.array( [tuple(x) for x in data], dtype = np.dtype(dt))
+
+
+def slice_vectorized(reader):
+    """New slicing: one slice per col over all lines."""
+    cols = helpers.JohnstonarchiveReader.slice_fixed_width_columns(reader.decoded_body_, [par_dict["indices"] for par_dict in reader.col_parameters_.values()])
+    dt = [ (n, 'object') for n in reader.col_parameters_]
+    data = np.empty(len(reader.decoded_body_), dtype = np.dtype(dt))
+    for descr, col in zip(reader.col_parameters_, cols):
+        data[descr] = col
+    return data
+
+
+def read_and_slice_decoded(reader):
+    """Reads the file, decodes and splits it into lines, and slices the cols out of the lines."""
+    reader.read_from_body(helpers.JohnstonarchiveReader.fetch_url(reader.url_))
+    return reader.slice_table_cols()[0]
+
+
+def read_and_slice_mapped(reader):
+    """Memory-maps the file and slices the cols out of the mapped bytes."""
+    reader.read_from_file()
+    assert reader.sliced_ is not None, f"[ERROR] {reader.url_} is not read from the mapped file."
+    return reader.slice_table_cols()[0]
+
+
+def main(yamldir, htmldir, repeat):
+    """
+    Runs the benchmark and prints the timings.
+
+    Parameters
+    ---------
+    yamldir : str
+        folder with the *_tables.yml files
+    htmldir : str
+        folder with the archived html files
+    repeat : int
+        number of runs per timing; fastest is reported
+    """
+    readers = helpers.make_local_readers(yamldir, htmldir)
+    n_rows = sum(len(r.decoded_body_) for r in readers)
+
+    for r in readers:
+        assert slice_per_cell(r).tolist() == slice_vectorized(r).tolist(), f"[ERROR] Different output for {r.url_}"
+
+    t_old = helpers.best_of(lambda: [slice_per_cell(r) for r in readers], repeat)
+    t_new = helpers.best_of(lambda: [slice_vectorized(r) for r in readers], repeat)
+
+    for r in readers:
+        for (decoded, mapped) in zip(read_and_slice_decoded(r), read_and_slice_mapped(r)):
+            assert decoded.tolist() == mapped.tolist(), f"[ERROR] Different output of mapped file for {r.url_}"
+    t_decoded = helpers.best_of(lambda: [read_and_slice_decoded(r) for r in readers], repeat)
+    t_mapped = helpers.best_of(lambda: [read_and_slice_mapped(r) for r in readers], repeat)
+
+    def read_all():
+        with contextlib.redirect_stdout(io.StringIO()):
+            for r in readers:
+                r.read_data()
+                r.add_full_timestamp()
+    t_full = helpers.best_of(read_all, repeat)
+
+    # peak memory of read_data plus timestamps for each table, as used in read_johnston_data.py
+    peaks = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for r in readers:
+            tracemalloc.start()
+            r.read_data()
+            r.add_full_timestamp()
+            peaks += [tracemalloc.get_traced_memory()[1]]
+            tracemalloc.stop()
+
+    print(f"[INFO] {len(readers)} tables, {n_rows} rows.")
+    print(f"slicing per cell   : {t_old*1e3:8.2f} ms")
+    print(f"slicing vectorized : {t_new*1e3:8.2f} ms  (x{t_old/t_new:.1f})")
+    print(f"read + slice decoded file : {t_decoded*1e3:8.2f} ms")
+    print(f"read + slice mapped file  : {t_mapped*1e3:8.2f} ms  (x{t_decoded/t_mapped:.1f})")
+    print(f"read_data + add_full_timestamp: {t_full*1e3:8.2f} ms")
+    print(f"peak memory of read_data + add_full_timestamp: {max(peaks)/1e6:.2f} MB (largest table), {sum(peaks)/1e6:.2f} MB (sum over tables)")
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-y", "--yamldir", help="folder with yaml settings", default="../../johnstonsarchive-nucleartest-reader/yaml")
+    parser.add_argument("-d", "--htmldir", help="folder with archived html tables", default="../../obtained_data/johnston_original_html")
+    parser.add_argument("-n", "--repeat", help="number of runs per timing", type=int, default=5)
+
+    args = parser.parse_args()
+
+    main(args.yamldir, args.htmldir, args.repeat)
@@ -0,0 +1,85 @@
+"""
+Code snippet to set up readers on the archived html tables for benchmarking.
+"""
+
+import os
+import sys
+import time
+import yaml
+import pathlib
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "../../johnstonsarchive-nucleartest-reader"))
+
+import DataCollector
+import DataFrameFile
+import JohnstonarchiveReader
+
+
+def load_settings(yamldir):
+    """
+    Helper function to read all yaml settings in a folder.
+
+    Parameters
+    ----------
+    yamldir : str
+        folder with the *_tables.yml files
+    Returns
+    ------
+    list of dicts with the settings, in sorted order of the filenames.
+    """
+    settings = []
+    for f in sorted(os.listdir(yamldir)):
+        with open(os.path.join(yamldir, f), 'r') as file:
+            settings += [yaml.safe_load(file)]
+    return settings
+
+
+def make_local_readers(yamldir, htmldir):
+    """
+    Helper function to make one reader per table, pointing to the archived html files instead of the johnston archive.
+
+    Parameters
+    ----------
+    yamldir : str
+        folder with the *_tables.yml files
+    htmldir : str
+        folder with the archived html files (same filenames as on the johnston archive)
+    Returns
+    ------
+    list of JohnstonarchiveReader with read in table bodies and the corrections of the settings.
+    """
+    readers = []
+    for s in load_settings(yamldir):
+        for url, lines in zip(s["html_general"]["urls"], s["html_general"]["table_lines_in_html_file"]):
+            reader = JohnstonarchiveReader.JohnstonarchiveReader(statename=s["general"]["state"])
+            localfile = pathlib.Path(htmldir, os.path.basename(url)).resolve()
+            reader.set_table_params(url=localfile.as_uri(), firstline=lines[0], lastline=lines[1])
+            for key, (start, end, dtype) in s["columns"].items():
+                reader.add_col_params(col_description=key, str_index_start=start, str_index_end=end, col_datatype={"int": int, "float": float, "str": str}[dtype])
+            for correction in s.get("corrections", []):
+                reader.add_correction(test_id=correction["ID"], col_description=correction["col"], correction={k: v for (k, v) in correction.items() if k not in ["ID", "col"]})
+            reader.read_from_url()
+            readers += [reader]
+    return readers
+
+
+def best_of(func, repeat):
+    """
+    Helper function to time a function.
+
+    Parameters
+    ----------
+    func : callable
+        function without arguments to time
+    repeat : int
+        number of runs
+    Returns
+    ------
+    fastest run time in seconds.
+    """
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func()
+        times += [time.perf_counter() - t0]
+    return min(times)
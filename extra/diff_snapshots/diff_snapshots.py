@@ -0,0 +1,250 @@
+#!/usr/bin/env python3.13
+
+import os
+import sys
+import json
+import yaml
+import pickle
+import hashlib
+import argparse
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "../../johnstonsarchive-nucleartest-reader"))
+
+import DataCollector
+import DataFrameFile
+import JohnstonarchiveReader
+import read_johnston_data
+
+
+def load_settings(yamlfilename):
+    """
+    Helper function to read the settings of a single yaml file or of all yaml files in a folder (sorted by filename).
+    """
+    yamlfilename_list = [yamlfilename]
+    if os.path.isdir(yamlfilename):
+        yamlfilename_list = [f"{yamlfilename}/{f}" for f in sorted(os.listdir(yamlfilename))]
+
+    settings_list = []
+    for f in yamlfilename_list:
+        with open(f, 'r') as file:
+            settings_list += [yaml.safe_load(file)]
+    return settings_list
+
+
+def get_code_hash():
+    """
+    Helper function to hash the code of the reader, so that pages parsed by another version of it are not reused.
+    """
+    h = hashlib.sha256()
+    for codefile in [JohnstonarchiveReader.__file__, read_johnston_data.__file__, DataCollector.__file__, DataFrameFile.__file__]:
+        with open(codefile, 'rb') as file:
+            h.update(file.read())
+    return h.hexdigest()
+
+
+def get_page_key(code_hash, settings, url, lines, body):
+    """
+    Helper function to get the key of a parsed page: hash of the page content, the settings of its table, and the reader code. Identical pages in different snapshots get the same key and are parsed only once.
+    """
+    h = hashlib.sha256(code_hash.encode("utf-8"))
+    h.update(json.dumps([settings["general"], settings["columns"], settings.get("corrections", []), os.path.basename(url), lines], sort_keys=True).encode("utf-8"))
+    h.update(hashlib.sha256(body).digest())
+    return h.hexdigest()
+
+
+def read_page(key, url, lines, indices, statename, body, corrections, pages, builddir=None):
+    """
+    Helper function to parse a page, or to take it from the pages already parsed in this run or (if builddir is given) in earlier runs.
+
+    Parameters
+    ---------
+    key : str
+        key of the page, see get_page_key
+    url, lines, indices, statename, body, corrections :
+        see read_johnston_data.read_table
+    pages : dict
+        parsed pages of this run with their keys; the page is added to it
+    builddir : str or None
+        folder with the parsed pages of earlier runs
+
+    Returns
+    -------
+    chunks : list of dict
+        cols of the table, see read_johnston_data.read_table
+    """
+    if key in pages:
+        return pages[key]
+
+    pagefilename = None if builddir is None else f"{builddir}/{key}.pkl"
+    if pagefilename is not None and os.path.isfile(pagefilename):
+        with open(pagefilename, 'rb') as file:
+            pages[key] = pickle.load(file)
+        return pages[key]
+
+    pages[key] = read_johnston_data.read_table(url, lines, indices, statename, body=body, corrections=corrections)
+
+    if pagefilename is not None:
+        os.makedirs(builddir, exist_ok=True)
+        with open(pagefilename, 'wb') as file:
+            pickle.dump(pages[key], file)
+    return pages[key]
+
+
+def read_state_snapshot(settings, snapshotdir, code_hash, pages, builddir=None):
+    """
+    Helper function to read the tables of one yaml file from a snapshot folder, which has the html files with the same filenames as on the johnston archive.
+
+    Returns
+    -------
+    (keys, data) : (tuple of str, DataCollector) or (None, None)
+        keys of the pages and the extracted data including the STATE col; (None, None) if a page is missing in the snapshot.
+    """
+    (statename, urls, table_lines_in_html, indices_dtypes, corrections) = read_johnston_data.get_state_params(settings)
+
+    keys = []
+    data = DataCollector.DataCollector()
+    for (url, lines) in zip(urls, table_lines_in_html):
+        pagefilename = os.path.join(snapshotdir, os.path.basename(url))
+        if not os.path.isfile(pagefilename):
+            print(f"[INFO] {os.path.basename(url)} missing in snapshot {snapshotdir}, skipped {statename}.")
+            return (None, None)
+        with open(pagefilename, 'rb') as file:
+            body = file.read()
+
+        key = get_page_key(code_hash, settings, url, lines, body)
+        for cols in read_page(key, url, lines, indices_dtypes, statename, body, corrections, pages, builddir):
+            data.add_columns(cols)
+        keys += [key]
+
+    data.set_constant_column("STATE", statename)
+    return (tuple(keys), data)
+
+
+def diff_state_data(old, new, cols):
+    """
+    Helper function to find the changes of the tests of one state between two snapshots.
+
+    Parameters
+    ---------
+    old, new : pd.DataFrame
+        data of the state in the older and in the newer snapshot
+    cols : list of str
+        cols to compare
+
+    Returns
+    -------
+    changes : dict of np.array
+        cols ID, CHANGE ("added", "removed" or "changed"), FIELD (None for added and removed tests), OLD and NEW values.
+    """
+    old = old.set_index("ID")
+    new = new.set_index("ID")
+
+    removed = old.index.difference(new.index).to_numpy()
+    added = new.index.difference(old.index).to_numpy()
+    common = old.index.intersection(new.index)
+
+    ids = [removed, added]
+    change = [np.full(len(removed), "removed", dtype=object), np.full(len(added), "added", dtype=object)]
+    fields = [np.full(len(removed) + len(added), None, dtype=object)]
+    old_values = [np.full(len(removed) + len(added), None, dtype=object)]
+    new_values = [np.full(len(removed) + len(added), None, dtype=object)]
+
+    for col in cols:
+        a = old.loc[common, col].to_numpy(dtype=object)
+        b = new.loc[common, col].to_numpy(dtype=object)
+        # compared only where both are given, as == on pd.NA (e.g. of Int64 cols like GZALT) is not a bool
+        (missing_a, missing_b) = (pd.isna(a), pd.isna(b))
+        given = ~missing_a & ~missing_b
+        equal = np.zeros(len(a), dtype=bool)
+        equal[given] = (a[given] == b[given]).astype(bool)
+        changed = (missing_a != missing_b) | (given & ~equal)
+        ids += [common.to_numpy()[changed]]
+        change += [np.full(changed.sum(), "changed", dtype=object)]
+        fields += [np.full(changed.sum(), col, dtype=object)]
+        old_values += [a[changed]]
+        new_values += [b[changed]]
+
+    return {"ID": np.concatenate(ids), "CHANGE": np.concatenate(change), "FIELD": np.concatenate(fields), "OLD": np.concatenate(old_values), "NEW": np.concatenate(new_values)}
+
+
+def main(yamlfilename, snapshotdir, outfilename, builddir=None):
+    """
+    Reads all snapshots of the johnston archive in a folder and writes a change log of the tests between consecutive snapshots.
+
+    Parameters
+    ---------
+    yamlfilename : str
+        Settings for data reading. Can be single yaml-file or folder with yaml-files.
+    snapshotdir : str
+        Folder with one subfolder per snapshot (e.g. named by date), each with the html files of the johnston archive. Snapshots are compared in the order of the subfolder names. A snapshot whose tables are at other lines can have its own yaml files in a subfolder yaml, which replace the settings of the same states.
+    outfilename : str
+        Filename to save the change log to; csv if it ends with .csv, else pd.Dataframe in the format given by its extension (see DataFrameFile; OLD and NEW as strings in parquet and Arrow files). One row per change with cols STATE, ID, CHANGE, FIELD, OLD, NEW, SNAPSHOT_OLD, SNAPSHOT_NEW.
+    builddir : str or None
+        If given, parsed pages are kept in this folder and reused in later runs.
+    """
+    settings_list = load_settings(yamlfilename)
+    snapshots = sorted(f for f in os.listdir(snapshotdir) if os.path.isdir(os.path.join(snapshotdir, f)))
+    code_hash = get_code_hash()
+
+    # settings of each state in each snapshot
+    snapshot_settings = {}
+    for snapshot in snapshots:
+        snapshot_settings[snapshot] = {settings["general"]["state"]: settings for settings in settings_list}
+        if os.path.isdir(os.path.join(snapshotdir, snapshot, "yaml")):
+            snapshot_settings[snapshot] |= {settings["general"]["state"]: settings for settings in load_settings(os.path.join(snapshotdir, snapshot, "yaml"))}
+
+    pages = {}
+    changes = DataCollector.DataCollector()
+    for settings in settings_list:
+        (statename, _, _, indices_dtypes, _) = read_johnston_data.get_state_params(settings)
+        cols = [f"{col}_orig" if col in JohnstonarchiveReader.PARSED_COLS else col for col in indices_dtypes if col != "ID"]
+
+        # last snapshot with all pages of the state, its page keys and data
+        (last_snapshot, last_keys, last_data) = (None, None, None)
+        for snapshot in snapshots:
+            (keys, data) = read_state_snapshot(snapshot_settings[snapshot][statename], os.path.join(snapshotdir, snapshot), code_hash, pages, builddir)
+            if keys is None:
+                continue
+            if keys == last_keys: # same pages, no changes
+                last_snapshot = snapshot
+                continue
+
+            data = data.get_dataframe()
+            if last_data is not None:
+                state_changes = diff_state_data(last_data, data, cols)
+                n = len(state_changes["ID"])
+                print(f"[INFO] {statename}: {n} changes from {last_snapshot} to {snapshot}.")
+                state_changes = {"STATE": np.full(n, statename, dtype=object)} | state_changes
+                state_changes |= {"SNAPSHOT_OLD": np.full(n, last_snapshot, dtype=object), "SNAPSHOT_NEW": np.full(n, snapshot, dtype=object)}
+                changes.add_columns(state_changes)
+            (last_snapshot, last_keys, last_data) = (snapshot, keys, data)
+
+    print(f"[INFO] Parsed {len(pages)} distinct pages of {len(snapshots)} snapshots.")
+
+    df = changes.get_dataframe()
+    if outfilename.endswith(".csv"):
+        df.to_csv(outfilename, index=False)
+    else:
+        if DataFrameFile.is_columnar(outfilename):
+            # OLD and NEW mix the types of all compared cols, parquet and Arrow files need one type per col
+            for descr in ["OLD", "NEW"]:
+                df[descr] = pd.Series([None if pd.isna(v) else str(v) for v in df[descr]], dtype=object)
+        DataFrameFile.save_dataframe(df, outfilename)
+
+    print(f"[INFO] Saved change log with {len(df)} changes at {outfilename}.")
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-i", "--infilename", help="yaml file or folder with yaml files with settings", required=True)
+    parser.add_argument("-s", "--snapshotdir", help="folder with one subfolder of html files per snapshot", required=True)
+    parser.add_argument("-o", "--outfilename", help="change log (.csv, .parquet, .feather/.arrow or pickled pd.Dataframe)", required=True)
+    parser.add_argument("--builddir", help="folder to keep parsed pages in; pages with the same content are only parsed once across runs", required=False)
+
+    args = parser.parse_args()
+
+    main(args.infilename, args.snapshotdir, args.outfilename, args.builddir)
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3.13
+
+"""
+Exports the dataframe to several formats at once: the dataframe is loaded only once and the files are written concurrently. The format of each output file is given by its extension (.csv, .csv.gz, .csv.zst, .h5/.hdf5/.hdf, .html/.htm, .sqlite/.db).
+
+usage: export.py [-h] -i INFILENAME -o OUTFILENAMES [OUTFILENAMES ...] [-c COLUMNS] [-j JOBS] [--csv_chunksize CSV_CHUNKSIZE] [--csv_partition_by CSV_PARTITION_BY] [--csv_jobs CSV_JOBS] [--html_mode {table,virtual}] [--html_chunk_size HTML_CHUNK_SIZE] [--hdf_query_columns HDF_QUERY_COLUMNS] [--hdf_complevel HDF_COMPLEVEL] [--hdf_complib HDF_COMPLIB] [--hdf_chunksize HDF_CHUNKSIZE] [--hdf_no_categoricals]
+"""
+
+import os
+import sys
+import time
+import argparse
+import threading
+import concurrent.futures
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "../../johnstonsarchive-nucleartest-reader"))
+
+import DataFrameFile
+import to_csv
+import to_hdf
+import to_html
+import to_sqlite
+
+
+WRITERS = {".csv": ("csv", to_csv.write_csv), ".h5": ("hdf", to_hdf.write_hdf), ".hdf5": ("hdf", to_hdf.write_hdf), ".hdf": ("hdf", to_hdf.write_hdf), ".html": ("html", to_html.write_html), ".htm": ("html", to_html.write_html),
+    ".sqlite": ("sqlite", to_sqlite.write_sqlite), ".db": ("sqlite", to_sqlite.write_sqlite)}
+
+# the hdf5 library is not thread safe, so hdf files are written one after the other
+hdf_lock = threading.Lock()
+
+
+def get_writer(outfilename):
+    """Helper function to get the format name and writer function of an output file from its extension."""
+    extension = os.path.splitext(outfilename.lower().removesuffix(".gz").removesuffix(".zst"))[1] # compressed csv, e.g. .csv.gz
+    assert extension in WRITERS, f"[ERROR] Unknown export format of {outfilename}, use one of {', '.join(WRITERS)}."
+    return WRITERS[extension]
+
+
+def write_timed(writer, df, outfilename, options):
+    """Helper function to run one writer with its options and return its run time in seconds."""
+    t = time.perf_counter()
+    if writer is to_hdf.write_hdf:
+        with hdf_lock:
+            writer(df, outfilename, **options)
+    else:
+        writer(df, outfilename, **options)
+    return time.perf_counter() - t
+
+
+def main(infilename, outfilenames, columns=None, jobs=3, options=None):
+    """
+    Exports pd.Dataframe to all given files and prints the time needed for loading and for each file.
+
+    Parameters
+    ---------
+    infilename : str
+        Filename of pd.Dataframe (.parquet, .feather/.arrow or pickle, see DataFrameFile).
+    outfilenames : list of str
+        Filenames to save the outputs to; the format of each is given by its extension.
+    columns : list of str or None
+        If given, only these cols are exported (and read from parquet/arrow files).
+    jobs : int
+        Number of files written at the same time.
+    options : dict of dict or None
+        Keyword arguments of the writers by format, e.g. {"html": {"mode": "virtual"}} (see to_html.write_html).
+    """
+    if options is None:
+        options = {}
+    writers = [get_writer(outfilename) for outfilename in outfilenames]
+    # the partitions and the manifest of a csv output are named after it without the extensions, so two csv outputs would write the same files
+    if options.get("csv", {}).get("partition_by") is not None:
+        assert sum(fmt == "csv" for (fmt, _) in writers) <= 1, "[ERROR] With csv partitions, give only one csv output file; it is replaced by the partitions."
+
+    t_start = time.perf_counter()
+    df = DataFrameFile.load_dataframe(infilename, columns=columns)
+    t_load = time.perf_counter() - t_start
+    print(f"[INFO] Loaded {len(df)} rows and {len(df.columns)} cols from {infilename}.")
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as executor:
+        futures = [executor.submit(write_timed, writer, df, outfilename, options.get(fmt, {})) for ((fmt, writer), outfilename) in zip(writers, outfilenames)]
+        times = [future.result() for future in futures]
+    t_total = time.perf_counter() - t_start
+
+    print(f"{'format':>8} {'time [s]':>9}  file")
+    print(f"{'load':>8} {t_load:9.3f}  {infilename}")
+    for ((fmt, _), outfilename, t) in zip(writers, outfilenames, times):
+        print(f"{fmt:>8} {t:9.3f}  {outfilename}")
+    print(f"{'total':>8} {t_total:9.3f}")
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-i", "--infilename", help="pd.Dataframe (.parquet, .feather/.arrow or pickle) containing nuclear tests from johnston archive", required=True)
+    parser.add_argument("-o", "--outfilenames", help="files to export to, format given by extension (.csv, .csv.gz, .csv.zst, .h5, .html, .sqlite)", nargs="+", required=True)
+    parser.add_argument("-c", "--columns", help="comma separated cols to export, e.g. ID,STATE,DATETIME,LAT,LONG,YIELD; default all", required=False)
+    parser.add_argument("-j", "--jobs", help="number of files written at the same time", type=int, default=3)
+    parser.add_argument("--csv_chunksize", help="number of rows written at a time to the csv table", type=int, required=False)
+    parser.add_argument("--csv_partition_by", help="write one csv file per value of this col (e.g. STATE) or per decade (decade), plus a manifest; they replace the csv output file, so give only one", required=False)
+    parser.add_argument("--csv_jobs", help="number of csv partitions written at the same time", type=int, default=1)
+    parser.add_argument("--html_mode", help="table: plain html table; virtual: rows as json, only visible rows are rendered, with filtering and sorting in the browser", choices=["table", "virtual"], default="table")
+    parser.add_argument("--html_chunk_size", help="number of rows written at a time with html mode virtual", type=int, default=1000)
+    parser.add_argument("--hdf_query_columns", help="comma separated cols of the hdf table for where selections, which are indexed; default all", required=False)
+    parser.add_argument("--hdf_complevel", help="compression level of the hdf table from 0 (none) to 9", type=int, default=0)
+    parser.add_argument("--hdf_complib", help="compression library of the hdf table, e.g. zlib, blosc, blosc:zstd, blosc:lz4", required=False)
+    parser.add_argument("--hdf_chunksize", help="number of rows written at a time to the hdf table", type=int, required=False)
+    parser.add_argument("--hdf_no_categoricals", help="store categorical cols as strings in the hdf table, for faster where selections", action="store_true")
+
+    args = parser.parse_args()
+
+    options = {
+        "csv": {"chunksize": args.csv_chunksize, "partition_by": args.csv_partition_by, "jobs": args.csv_jobs},
+        "html": {"mode": args.html_mode, "chunk_size": args.html_chunk_size},
+        "hdf": {"data_columns": True if args.hdf_query_columns is None else args.hdf_query_columns.split(","), "complevel": args.hdf_complevel, "complib": args.hdf_complib, 
+            "chunksize": args.hdf_chunksize, "keep_categoricals": not args.hdf_no_categoricals},
+    }
+
+    main(args.infilename, args.outfilenames, None if args.columns is None else args.columns.split(","), args.jobs, options)
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3.13
+
+"""
+Selects rows of an hdf table written by to_hdf.py (or export.py) with a where expression, e.g. "STATE == 'US' & YEAR >= 1960 & YEAR < 1970". Only the query cols (see to_hdf.py --query_columns) can be used in the expression; the selection is done on their indexes, without loading the full table.
+
+usage: query_hdf.py [-h] -i INFILENAME [-w WHERE] [-c COLUMNS] [-o OUTFILENAME]
+"""
+
+import os
+import sys
+import argparse
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "../../johnstonsarchive-nucleartest-reader"))
+
+import DataFrameFile
+
+
+def get_query_columns(infilename):
+    """Helper function to get the cols of the hdf table that can be used in where expressions."""
+    if isinstance(infilename, pd.HDFStore):
+        return list(infilename.get_storer('data').data_columns)
+    with pd.HDFStore(infilename, mode='r') as store:
+        return list(store.get_storer('data').data_columns)
+
+
+def query(infilename, where=None, columns=None):
+    """
+    Selects rows and cols of an hdf table.
+
+    Parameters
+    ---------
+    infilename : str or pd.HDFStore
+        Filename of hdf table written by to_hdf.write_hdf, or the opened file (for many queries, so the file is opened only once).
+    where : str or None
+        Where expression on the query cols, e.g. "STATE == 'US' & DATETIME >= '1960-01-01'"; None for all rows.
+    columns : list of str or None
+        If given, only these cols are returned.
+
+    Returns
+    -------
+    df : pd.DataFrame
+        selected rows
+    """
+    try:
+        return pd.read_hdf(infilename, key='data', where=where, columns=columns)
+    except (ValueError, NameError) as e:
+        assert False, f"[ERROR] Invalid where expression '{where}' ({e}). Cols that can be used in it: {', '.join(get_query_columns(infilename))}."
+
+
+def main(infilename, where=None, columns=None, outfilename=None):
+    """
+    Selects rows of an hdf table and saves or prints them.
+
+    Parameters
+    ---------
+    infilename, where, columns :
+        see query
+    outfilename : str or None
+        Filename to save the selected rows to; csv if it ends with .csv, else pd.Dataframe in the format given by its extension (see DataFrameFile). If None, the rows are printed.
+    """
+    df = query(infilename, where, columns)
+    print(f"[INFO] Selected {len(df)} rows.")
+
+    if outfilename is None:
+        print(df.to_string())
+    elif outfilename.endswith(".csv"):
+        df.to_csv(outfilename)
+    elif DataFrameFile.is_columnar(outfilename):
+        # parquet and Arrow files do not keep the index (the row numbers in the hdf table)
+        DataFrameFile.save_dataframe(df.reset_index(drop=True), outfilename)
+    else:
+        DataFrameFile.save_dataframe(df, outfilename)
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-i", "--infilename", help="hdf table written by to_hdf.py or export.py", required=True)
+    parser.add_argument("-w", "--where", help="where expression on the query cols, e.g. \"STATE == 'US' & YEAR >= 1960\"; default all rows", required=False)
+    parser.add_argument("-c", "--columns", help="comma separated cols to return; default all", required=False)
+    parser.add_argument("-o", "--outfilename", help="file to save the selected rows to (.csv, .parquet, .feather/.arrow or pickle); default print them", required=False)
+
+    args = parser.parse_args()
+
+    main(args.infilename, args.where, None if args.columns is None else args.columns.split(","), args.outfilename)
@@ -1,36 +1,127 @@
 #!/usr/bin/env python3.13
 
-import pickle
+import os
+import re
+import sys
+import json
+import hashlib
 import argparse
+import concurrent.futures
 
-def main(infilename, outfilename): 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "../../johnstonsarchive-nucleartest-reader"))
+
+import DataFrameFile
+
+COMPRESSIONS = {"gzip": ".gz", "zstd": ".zst"}
+
+# format of datetimes in all csv files, partitioned or not (pandas would write them only as precise as needed per file)
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+
+
+def get_partition_filename(outfilename, value):
+    """Helper function to get the filename of a partition: the value is inserted before the .csv extension, e.g. tests.csv.gz -> tests_US.csv.gz."""
+    i = outfilename.rfind(".csv")
+    (base, extension) = (outfilename, "") if i < 0 else (outfilename[:i], outfilename[i:])
+    return f"{base}_{re.sub(r'[^\w.-]', '_', value)}{extension}"
+
+
+def get_partition_values(df, partition_by):
+    """Helper function to get the partition of each row: the decade of YEAR (e.g. 1960s) for partition_by "decade", else the value of col partition_by."""
+    if partition_by == "decade":
+        return (df["YEAR"] // 10 * 10).astype(int).astype(str) + "s"
+    return df[partition_by].astype(str)
+
+
+def write_csv_file(df, outfilename, compression="infer", chunksize=None, date_format=None):
+    """Helper function to write one csv file and return its number of rows and the sha256 checksum of the file."""
+    if compression == "gzip" or (compression == "infer" and outfilename.endswith(".gz")):
+        compression = {"method": "gzip", "mtime": 0} # no timestamp in the file, so the checksum only changes with the data
+    df.to_csv(outfilename, compression=compression, chunksize=chunksize, date_format=date_format)
+    h = hashlib.sha256()
+    with open(outfilename, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            h.update(block)
+    return (len(df), h.hexdigest())
+
+
+def write_csv(df, outfilename, compression="infer", chunksize=None, partition_by=None, jobs=1):
+    """
+    Writes pd.Dataframe as csv table, or as one csv table per partition with a manifest.
+
+    Parameters
+    ---------
+    df : pd.DataFrame
+        data to write
+    outfilename : str
+        Filename to save the output csv to. With partition_by, this file is not written: the partitions replace it and are saved next to it (see get_partition_filename), and the manifest as json with the same name without .csv extension and with _manifest.json, e.g. tests_manifest.json for tests.csv.gz.
+    compression : str or None
+        "gzip" or "zstd" (needs zstandard), "infer" to take it from the extension of outfilename (.gz, .zst), None for none. If compression is given and outfilename does not have its extension, it is added.
+    chunksize : int or None
+        Number of rows written at a time.
+    partition_by : str or None
+        If given, one file per value of this col, or per decade of YEAR for "decade".
+    jobs : int
+        Number of partitions written at the same time.
+    """
+    if compression in COMPRESSIONS and not outfilename.endswith(COMPRESSIONS[compression]):
+        outfilename += COMPRESSIONS[compression]
+
+    if partition_by is None:
+        write_csv_file(df, outfilename, compression, chunksize, DATE_FORMAT)
+        return
+
+    values = get_partition_values(df, partition_by)
+    partitions = [(value, part) for (value, part) in df.groupby(values.to_numpy(), sort=True)]
+    filenames = [get_partition_filename(outfilename, value) for (value, _) in partitions]
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as executor:
+        futures = [executor.submit(write_csv_file, part, filename, compression, chunksize, DATE_FORMAT) for ((_, part), filename) in zip(partitions, filenames)]
+        results = [future.result() for future in futures]
+
+    manifest = {
+        "partition_by": partition_by, 
+        "n_rows": len(df), 
+        "partitions": [{"value": value, "file": os.path.basename(filename), "n_rows": n_rows, "sha256": checksum} for ((value, _), filename, (n_rows, checksum)) in zip(partitions, filenames, results)],
+    }
+    i = outfilename.rfind(".csv")
+    manifestfilename = f"{outfilename if i < 0 else outfilename[:i]}_manifest.json"
+    with open(manifestfilename, 'w') as file:
+        json.dump(manifest, file, indent=1)
+    print(f"[INFO] Wrote {len(partitions)} partitions by {partition_by} instead of {outfilename}, manifest at {manifestfilename}.")
+
+
+def main(infilename, outfilename, columns=None, compression="infer", chunksize=None, partition_by=None, jobs=1): 
     """
     Exports pd.Dataframe to csv table. 
 
     Parameters
     ---------
     infilename : str 
-        Filename of pickled pd.Dataframe. 
+        Filename of pd.Dataframe (.parquet, .feather/.arrow or pickle, see DataFrameFile). 
     outputfilename : str 
         Filename to save the output csv to.
+    columns : list of str or None
+        If given, only these cols are exported (and read from parquet/arrow files).
+    compression, chunksize, partition_by, jobs :
+        see write_csv
     """
-    infile = open(infilename, 'rb')
-    df = pickle.load(infile)
-    
-    # Cannot convert to csv if those cols are of mixed types 
-    # (appears when appending DPRK data)
-    df["CRAT_occured"] = df["CRAT_occured"].astype(str)
-    df["VENT_occured"] = df["VENT_occured"].astype(str)
+    df = DataFrameFile.load_dataframe(infilename, columns=columns)
 
-    df.to_csv(outfilename)
+    write_csv(df, outfilename, compression, chunksize, partition_by, jobs)
 
 
 if __name__ == "__main__":
 
     parser = argparse.ArgumentParser()
-    parser.add_argument("-i", "--infilename", help="pickled pd.Dataframe containing nuclear tests from johnston archive", required=True)
-    parser.add_argument("-o", "--outfilename", help="file to save exported hdf to", required=True)
+    parser.add_argument("-i", "--infilename", help="pd.Dataframe (.parquet, .feather/.arrow or pickle) containing nuclear tests from johnston archive", required=True)
+    parser.add_argument("-o", "--outfilename", help="file to save exported csv to", required=True)
+    parser.add_argument("-c", "--columns", help="comma separated cols to export, e.g. ID,STATE,DATETIME,LAT,LONG,YIELD; default all", required=False)
+
+    parser.add_argument("--compression", help="gzip or zstd; default from the extension of the output file (.gz, .zst)", choices=["gzip", "zstd"], default="infer")
+    parser.add_argument("--chunksize", help="number of rows written at a time", type=int, required=False)
+    parser.add_argument("-p", "--partition_by", help="write one file per value of this col (e.g. STATE) or per decade (decade), plus a manifest, instead of the output file", required=False)
+    parser.add_argument("-j", "--jobs", help="number of partitions written at the same time", type=int, default=1)
 
     args = parser.parse_args()
 
-    main(args.infilename, args.outfilename)
\ No newline at end of file
+    main(args.infilename, args.outfilename, None if args.columns is None else args.columns.split(","), args.compression, args.chunksize, args.partition_by, args.jobs)
\ No newline at end of file
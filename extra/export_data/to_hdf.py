@@ -1,36 +1,88 @@
 #!/usr/bin/env python3.13
 
-import pickle
+import os
+import sys
 import argparse
 
-def main(infilename, outfilename): 
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "../../johnstonsarchive-nucleartest-reader"))
+
+import DataFrameFile
+
+def write_hdf(df, outfilename, data_columns=True, complevel=0, complib=None, chunksize=None, expectedrows=None, keep_categoricals=True):
+    """
+    Writes pd.Dataframe as hdf table with key data.
+
+    Parameters
+    ---------
+    df : pd.DataFrame
+        data to write
+    outfilename : str
+        Filename to save the output hdf to.
+    data_columns : True or list of str
+        Cols that can be used in where selections (see query_hdf.py); they are stored as separate cols of the hdf table and indexed. True for all cols.
+    complevel : int
+        Compression level from 0 (no compression) to 9.
+    complib : str or None
+        Compression library, e.g. zlib, blosc, blosc:zstd or blosc:lz4; None for zlib.
+    chunksize : int or None
+        Number of rows written at a time.
+    expectedrows : int or None
+        Expected number of rows of the table, which sets the size of the hdf5 chunks; None for the number of rows of df.
+    keep_categoricals : bool
+        If False, categorical cols are stored as strings. Each categorical needs its own tables in the hdf file, which are opened again by every selection; without them, where selections are about ten times faster.
+
+    Object cols with tuples, lists or dicts (e.g. coords and FULL_LOC of add_geolocations.py) are stored as json strings, which hdf tables can hold; they are no query cols.
+    """
+    import json
+
+    nested = [ descr for descr in df.columns if df[descr].dtype == object and df[descr].map(lambda v: isinstance(v, (tuple, list, dict))).any() ]
+    if len(nested) > 0:
+        df = df.assign(**{ descr: [ json.dumps(v) if isinstance(v, (tuple, list, dict)) else None for v in df[descr] ] for descr in nested })
+        if data_columns is True:
+            data_columns = [ descr for descr in df.columns if descr not in nested ]
+    if not keep_categoricals:
+        df = df.astype({descr: object for descr in df.columns if isinstance(df[descr].dtype, pd.CategoricalDtype)})
+    with pd.HDFStore(outfilename, mode='w', complevel=complevel, complib=complib) as store:
+        store.append('data', df, format='table', data_columns=data_columns, chunksize=chunksize, expectedrows=expectedrows if expectedrows is not None else len(df))
+
+
+def main(infilename, outfilename, columns=None, data_columns=True, complevel=0, complib=None, chunksize=None, expectedrows=None, keep_categoricals=True): 
     """
     Exports pd.Dataframe to hdf table. 
 
     Parameters
     ---------
     infilename : str 
-        Filename of pickled pd.Dataframe. 
+        Filename of pd.Dataframe (.parquet, .feather/.arrow or pickle, see DataFrameFile). 
     outputfilename : str 
         Filename to save the output hdf to.
+    columns : list of str or None
+        If given, only these cols are exported (and read from parquet/arrow files).
+    data_columns, complevel, complib, chunksize, expectedrows, keep_categoricals :
+        see write_hdf
     """
-    infile = open(infilename, 'rb')
-    df = pickle.load(infile)
-    
-    # Cannot convert to hdf if those cols are of mixed types 
-    # (appears when appending DPRK data)
-    df["CRAT_occured"] = df["CRAT_occured"].astype(str)
-    df["VENT_occured"] = df["VENT_occured"].astype(str)
+    df = DataFrameFile.load_dataframe(infilename, columns=columns)
 
-    df.to_hdf(outfilename, key='data', data_columns=True)
+    write_hdf(df, outfilename, data_columns, complevel, complib, chunksize, expectedrows, keep_categoricals)
 
 
 if __name__ == "__main__":
 
     parser = argparse.ArgumentParser()
-    parser.add_argument("-i", "--infilename", help="pickled pd.Dataframe containing nuclear tests from johnston archive", required=True)
+    parser.add_argument("-i", "--infilename", help="pd.Dataframe (.parquet, .feather/.arrow or pickle) containing nuclear tests from johnston archive", required=True)
     parser.add_argument("-o", "--outfilename", help="file to save exported hdf to", required=True)
+    parser.add_argument("-c", "--columns", help="comma separated cols to export, e.g. ID,STATE,DATETIME,LAT,LONG,YIELD; default all", required=False)
+
+    parser.add_argument("-q", "--query_columns", help="comma separated cols for where selections, which are indexed, e.g. STATE,YEAR,DATETIME,TYPE; default all", required=False)
+    parser.add_argument("--complevel", help="compression level from 0 (none) to 9", type=int, default=0)
+    parser.add_argument("--complib", help="compression library, e.g. zlib, blosc, blosc:zstd, blosc:lz4", required=False)
+    parser.add_argument("--chunksize", help="number of rows written at a time", type=int, required=False)
+    parser.add_argument("--expectedrows", help="expected number of rows, sets the size of the hdf5 chunks", type=int, required=False)
+    parser.add_argument("--no_categoricals", help="store categorical cols as strings, for faster where selections", action="store_true")
 
     args = parser.parse_args()
 
-    main(args.infilename, args.outfilename)
\ No newline at end of file
+    main(args.infilename, args.outfilename, None if args.columns is None else args.columns.split(","), 
+        True if args.query_columns is None else args.query_columns.split(","), args.complevel, args.complib, args.chunksize, args.expectedrows, not args.no_categoricals)
\ No newline at end of file
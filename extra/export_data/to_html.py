@@ -1,21 +1,24 @@
 #!/usr/bin/env python3.13
 
-import pickle
+import os
+import sys
+import json
 import argparse
 
-def main(infilename, outfilename): 
-    """
-    Exports pd.Dataframe to html table. 
+import numpy as np
+import pandas as pd
 
-    Parameters
-    ---------
-    infilename : str 
-        Filename of pickled pd.Dataframe. 
-    outputfilename : str 
-        Filename to save the output html to.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "../../johnstonsarchive-nucleartest-reader"))
+
+import DataFrameFile
+
+def write_html(df, outfilename, mode="table", chunk_size=1000):
+    """
+    Writes pd.Dataframe as styled html table (mode "table") or as page with virtual scrolling (mode "virtual", see write_html_virtual).
     """
-    infile = open(infilename, 'rb')
-    df = pickle.load(infile)
+    if mode == "virtual":
+        write_html_virtual(df, outfilename, chunk_size)
+        return
 
     html_table = df.to_html(index=False, border=1)
 
@@ -53,13 +56,173 @@ def main(infilename, outfilename):
     outfile.write(styled_html)
     outfile.close()
 
+VIRTUAL_PAGE_HEAD = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<style>
+    body { font-family: sans-serif; margin: 20px; }
+    #scroller { height: 85vh; overflow: auto; border: 1px solid black; }
+    .row { display: grid; grid-template-columns: repeat(var(--n-cols), 150px); height: 26px; }
+    .row > div { padding: 4px 8px; border-right: 1px solid #ccc; white-space: nowrap; overflow: hidden; text-overflow: ellipsis; }
+    #header { position: sticky; top: 0; z-index: 1; background-color: #4CAF50; color: white; cursor: pointer; width: max-content; }
+    #body { position: relative; width: max-content; }
+    #rows { position: absolute; left: 0; }
+    #rows .row:nth-child(even) { background-color: #f2f2f2; }
+</style>
+</head>
+<body>
+<input id="filter" placeholder="Filter rows..." size="40"> <span id="status"></span>
+<div id="scroller"><div id="header" class="row"></div><div id="body"><div id="rows"></div></div></div>
+"""
+
+VIRTUAL_PAGE_TAIL = """<script>
+const rowHeight = 26;
+const cols = JSON.parse(document.getElementById("columns").textContent);
+const data = cols.map(() => []);
+for (const el of document.querySelectorAll("script.chunk")) {
+    JSON.parse(el.textContent).forEach((values, j) => { for (const v of values) data[j].push(v); });
+}
+const nRows = data.length ? data[0].length : 0;
+const scroller = document.getElementById("scroller"), body = document.getElementById("body"), rows = document.getElementById("rows");
+const header = document.getElementById("header"), status = document.getElementById("status");
+document.documentElement.style.setProperty("--n-cols", cols.length);
+
+const fmt = v => v === null ? "" : (typeof v === "object" ? JSON.stringify(v) : String(v));
+const esc = s => s.replace(/&/g, "&amp;").replace(/</g, "&lt;").replace(/"/g, "&quot;");
+let texts = null; // lower case text of each row, built on first filtering
+let view = Array.from({length: nRows}, (_, i) => i);
+let sortCol = -1, sortDir = 1;
+
+header.innerHTML = cols.map((c, j) => `<div data-col="${j}" title="${esc(c)}">${esc(c)}</div>`).join("");
+
+function render() {
+    body.style.height = view.length * rowHeight + "px";
+    const first = Math.max(0, Math.floor(scroller.scrollTop / rowHeight) - 10);
+    const last = Math.min(view.length, first + Math.ceil(scroller.clientHeight / rowHeight) + 20);
+    rows.style.top = first * rowHeight + "px";
+    let html = "";
+    for (let k = first; k < last; k++) {
+        const i = view[k];
+        html += "<div class=\\"row\\">" + data.map(values => { const s = esc(fmt(values[i])); return `<div title="${s}">${s}</div>`; }).join("") + "</div>";
+    }
+    rows.innerHTML = html;
+    status.textContent = `${view.length} of ${nRows} rows`;
+}
+
+function update() {
+    const q = document.getElementById("filter").value.toLowerCase();
+    if (q && texts === null) {
+        texts = Array.from({length: nRows}, (_, i) => data.map(values => fmt(values[i])).join("\\u0001").toLowerCase());
+    }
+    view = [];
+    for (let i = 0; i < nRows; i++) {
+        if (!q || texts[i].includes(q)) view.push(i);
+    }
+    if (sortCol >= 0) {
+        const values = data[sortCol];
+        view.sort((a, b) => {
+            const x = values[a], y = values[b];
+            if (x === null || y === null) return (x === null) - (y === null);
+            return (x < y ? -1 : x > y ? 1 : a - b) * sortDir;
+        });
+    }
+    render();
+}
+
+header.addEventListener("click", e => {
+    if (e.target.dataset.col === undefined) return;
+    const j = Number(e.target.dataset.col);
+    sortDir = j === sortCol ? -sortDir : 1;
+    sortCol = j;
+    update();
+});
+document.getElementById("filter").addEventListener("input", update);
+scroller.addEventListener("scroll", () => requestAnimationFrame(render));
+window.addEventListener("resize", render);
+update();
+</script>
+</body>
+</html>
+"""
+
+
+def to_json_default(value):
+    """Helper function for json.dumps to convert values json does not know, e.g. numpy arrays inside geolocations."""
+    if isinstance(value, (np.ndarray, np.generic)):
+        return value.tolist()
+    return str(value)
+
+
+def to_json_values(values):
+    """Helper function to convert a col to a list of values for json: NaN, NaT and None as null, datetimes as iso strings, other python objects (e.g. geolocations) as they are or as strings."""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        values = values.astype(object)
+    values = values.to_numpy()
+    if values.dtype.kind == "M":
+        strings = np.datetime_as_string(values, unit="ms").astype(object)
+        strings[np.isnat(values)] = None
+        return strings.tolist()
+    if values.dtype.kind == "f":
+        missing = np.isnan(values)
+        values = values.astype(object)
+        values[missing] = None
+        return values.tolist()
+    if values.dtype.kind in "iub":
+        return values.tolist()
+    values = values.astype(object)
+    values[pd.isna(values)] = None
+    return values.tolist()
+
+
+def write_html_virtual(df, outfilename, chunk_size=1000):
+    """
+    Writes pd.Dataframe as html page with virtual scrolling: the rows are stored as json and only the visible rows are rendered by the browser, which also filters and sorts them.
+
+    Rows are written in chunks of chunk_size, each as one json list of col values, so only one chunk is converted at a time.
+    """
+    with open(outfilename, "w") as outfile:
+        outfile.write(VIRTUAL_PAGE_HEAD)
+        outfile.write(f'<script id="columns" type="application/json">{json.dumps([str(descr) for descr in df.columns])}</script>\n')
+        for start in range(0, len(df), chunk_size):
+            chunk = df.iloc[start:start+chunk_size]
+            payload = json.dumps([to_json_values(chunk[descr]) for descr in df.columns], default=to_json_default, separators=(",", ":"))
+            outfile.write(f'<script class="chunk" type="application/json">{payload.replace("</", "<\\/")}</script>\n')
+        outfile.write(VIRTUAL_PAGE_TAIL)
+
+
+def main(infilename, outfilename, columns=None, mode="table", chunk_size=1000): 
+    """
+    Exports pd.Dataframe to html table. 
+
+    Parameters
+    ---------
+    infilename : str 
+        Filename of pd.Dataframe (.parquet, .feather/.arrow or pickle, see DataFrameFile). 
+    outputfilename : str 
+        Filename to save the output html to.
+    columns : list of str or None
+        If given, only these cols are exported (and read from parquet/arrow files).
+    mode : str
+        "table" for one html table with all rows, "virtual" for a page that stores the rows as json and only renders the visible ones. Better for large tables; filtering and sorting is done in the browser.
+    chunk_size : int
+        Number of rows written at a time in mode "virtual".
+    """
+    df = DataFrameFile.load_dataframe(infilename, columns=columns)
+
+    write_html(df, outfilename, mode, chunk_size)
+
 
 if __name__ == "__main__":
 
     parser = argparse.ArgumentParser()
-    parser.add_argument("-i", "--infilename", help="pickled pd.Dataframe containing nuclear tests from johnston archive", required=True)
+    parser.add_argument("-i", "--infilename", help="pd.Dataframe (.parquet, .feather/.arrow or pickle) containing nuclear tests from johnston archive", required=True)
     parser.add_argument("-o", "--outfilename", help="file to save exported html table to", required=True)
+    parser.add_argument("-c", "--columns", help="comma separated cols to export, e.g. ID,STATE,DATETIME,LAT,LONG,YIELD; default all", required=False)
+
+    parser.add_argument("-m", "--mode", help="table: plain html table; virtual: rows as json, only visible rows are rendered, with filtering and sorting in the browser", choices=["table", "virtual"], default="table")
+    parser.add_argument("--chunk_size", help="number of rows written at a time in mode virtual", type=int, default=1000)
 
     args = parser.parse_args()
 
-    main(args.infilename, args.outfilename)
\ No newline at end of file
+    main(args.infilename, args.outfilename, None if args.columns is None else args.columns.split(","), args.mode, args.chunk_size)
\ No newline at end of file
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3.13
+
+"""
+Exports the dataframe to a SQLite database with three tables, all keyed on (STATE, ID):
+
+- tests: one row per test with the parsed values, indexed on STATE, DATETIME, YIELD and TYPE
+- remarks: one row per test and parsed col (YIELD, YD-EST, CRAT, VENT) with the original table entry (ORIG) and the remark of the value (REMARK, e.g. < or ?)
+- geolocations: CC, REGION and FULL_LOC (as json) of the tests, if the dataframe has them (see add_geolocations.py)
+
+Query e.g. with sqlite3 tests.sqlite "SELECT ID, YIELD FROM tests WHERE STATE = 'USSR' AND TYPE = 'UG-T' AND DATETIME BETWEEN '1970' AND '1980' AND YIELD > 100"
+
+usage: to_sqlite.py [-h] -i INFILENAME -o OUTFILENAME [-c COLUMNS]
+"""
+
+import os
+import sys
+import json
+import sqlite3
+import argparse
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "../../johnstonsarchive-nucleartest-reader"))
+
+import DataFrameFile
+import JohnstonarchiveReader
+
+
+KEY_COLS = ["STATE", "ID"]
+INDEXED_COLS = ["STATE", "DATETIME", "YIELD", "TYPE"]
+GEOLOCATION_COLS = ["CC", "REGION", "FULL_LOC"]
+
+
+def quote(descr):
+    """Helper function to quote a col name for SQL (col names like YD-EST are no valid identifiers)."""
+    return '"' + descr.replace('"', '""') + '"'
+
+
+def get_sql_type(values):
+    """Helper function to get the SQLite type of a col."""
+    kind = values.dtype.kind if not isinstance(values.dtype, pd.CategoricalDtype) else "O"
+    return {"i": "INTEGER", "u": "INTEGER", "b": "INTEGER", "f": "REAL"}.get(kind, "TEXT")
+
+
+def to_sql_values(values):
+    """Helper function to convert a col to a list of python values for SQLite: None for missing entries, datetimes as iso strings, dicts and lists as json."""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        values = values.astype(object)
+    values = values.to_numpy()
+    if values.dtype.kind == "M":
+        strings = np.datetime_as_string(values, unit="ms").astype(object)
+        strings[np.isnat(values)] = None
+        return [s if s is None else s.replace("T", " ") for s in strings]
+    if values.dtype.kind == "f":
+        missing = np.isnan(values)
+        values = values.astype(object)
+        values[missing] = None
+        return values.tolist()
+    if values.dtype.kind in "iub":
+        return values.tolist()
+    values = values.astype(object)
+    values[pd.isna(values)] = None
+    return [json.dumps(v, default=lambda x: x.tolist() if isinstance(x, (np.ndarray, np.generic)) else str(x)) if isinstance(v, (dict, list, tuple, np.ndarray)) else v for v in values]
+
+
+def split_dataframe(df):
+    """
+    Helper function to split the dataframe into the cols of the three tables.
+
+    Returns
+    -------
+    (tests, remarks, geolocations) : (pd.DataFrame, pd.DataFrame, pd.DataFrame or None)
+        tests with all cols but the remarks and geolocations, remarks in long format with cols STATE, ID, COL, ORIG, REMARK (only rows with ORIG or REMARK given), geolocations with STATE, ID and the geolocation cols (None if the dataframe has none of them)
+    """
+    remark_cols = [f"{col}_{suffix}" for col in JohnstonarchiveReader.PARSED_COLS for suffix in ["orig", "value_remark"]]
+    geolocation_cols = [descr for descr in GEOLOCATION_COLS if descr in df.columns]
+    tests = df[[descr for descr in df.columns if descr not in remark_cols + GEOLOCATION_COLS + ["coords"]]]
+
+    remarks = []
+    for col in JohnstonarchiveReader.PARSED_COLS:
+        if f"{col}_orig" not in df.columns and f"{col}_value_remark" not in df.columns:
+            continue
+        orig = df[f"{col}_orig"].astype(object) if f"{col}_orig" in df.columns else pd.Series(None, index=df.index, dtype=object)
+        remark = df[f"{col}_value_remark"].astype(object) if f"{col}_value_remark" in df.columns else pd.Series(None, index=df.index, dtype=object)
+        orig = orig.where(~orig.isin(["", "None"]) & orig.notna(), None) # YIELD_orig is kept as str, so missing entries are "None"
+        remark = remark.where(remark.notna(), None)
+        given = orig.notna() | remark.notna()
+        remarks += [pd.DataFrame({"STATE": df.loc[given, "STATE"].astype(object), "ID": df.loc[given, "ID"], "COL": col, "ORIG": orig[given], "REMARK": remark[given]})]
+    remarks = pd.concat(remarks, ignore_index=True) if remarks else pd.DataFrame(columns=KEY_COLS + ["COL", "ORIG", "REMARK"])
+
+    geolocations = df[KEY_COLS + geolocation_cols] if geolocation_cols else None
+    return (tests, remarks, geolocations)
+
+
+def create_table(connection, name, df, primary_key):
+    """Helper function to create a table with the cols of df, if it does not exist yet, and to add cols of df that it does not have yet."""
+    cols = ", ".join(f"{quote(descr)} {get_sql_type(df[descr])}" for descr in df.columns)
+    connection.execute(f"CREATE TABLE IF NOT EXISTS {name} ({cols}, PRIMARY KEY ({', '.join(quote(descr) for descr in primary_key)}))")
+    existing = [row[1] for row in connection.execute(f"PRAGMA table_info({name})")]
+    for descr in df.columns:
+        if descr not in existing:
+            connection.execute(f"ALTER TABLE {name} ADD COLUMN {quote(descr)} {get_sql_type(df[descr])}")
+
+
+def upsert_table(connection, name, df, primary_key):
+    """Helper function to insert the rows of df into a table, replacing the values of rows with the same primary key."""
+    descrs = ", ".join(quote(descr) for descr in df.columns)
+    updates = ", ".join(f"{quote(descr)} = excluded.{quote(descr)}" for descr in df.columns if descr not in primary_key)
+    sql = f"INSERT INTO {name} ({descrs}) VALUES ({', '.join('?' * len(df.columns))}) ON CONFLICT ({', '.join(quote(descr) for descr in primary_key)}) DO " + (f"UPDATE SET {updates}" if updates else "NOTHING")
+    connection.executemany(sql, zip(*[to_sql_values(df[descr]) for descr in df.columns]))
+
+
+def upsert_sqlite(df, outfilename):
+    """
+    Inserts the tests of pd.Dataframe into a SQLite database, or updates them if a test with the same STATE and ID is already in it. Tables and indexes are created if they do not exist.
+
+    Parameters
+    ---------
+    df : pd.DataFrame
+        tests to insert or update
+    outfilename : str
+        Filename of the SQLite database.
+    """
+    (tests, remarks, geolocations) = split_dataframe(df)
+
+    with sqlite3.connect(outfilename) as connection:
+        create_table(connection, "tests", tests, KEY_COLS)
+        for descr in INDEXED_COLS:
+            if descr in tests.columns:
+                connection.execute(f"CREATE INDEX IF NOT EXISTS {quote(f'tests_{descr}')} ON tests ({quote(descr)})")
+        upsert_table(connection, "tests", tests, KEY_COLS)
+
+        # remarks of the updated tests are replaced as a whole, as a col may no longer have one
+        connection.execute("CREATE TABLE IF NOT EXISTS remarks (STATE TEXT, ID INTEGER, COL TEXT, ORIG TEXT, REMARK TEXT, PRIMARY KEY (STATE, ID, COL))")
+        connection.executemany("DELETE FROM remarks WHERE STATE = ? AND ID = ?", zip(to_sql_values(tests["STATE"]), to_sql_values(tests["ID"])))
+        upsert_table(connection, "remarks", remarks, KEY_COLS + ["COL"])
+
+        if geolocations is not None:
+            create_table(connection, "geolocations", geolocations, KEY_COLS)
+            upsert_table(connection, "geolocations", geolocations, KEY_COLS)
+
+        # statistics of the indexes, so that the query planner picks the most selective one
+        connection.execute("ANALYZE")
+    connection.close()
+
+
+def delete_state_sqlite(outfilename, state):
+    """
+    Removes all tests of a state from a SQLite database written by write_sqlite.
+    """
+    with sqlite3.connect(outfilename) as connection:
+        tables = [row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'")]
+        for name in ["tests", "remarks", "geolocations"]:
+            if name in tables:
+                connection.execute(f"DELETE FROM {name} WHERE STATE = ?", (state,))
+    connection.close()
+
+
+def write_sqlite(df, outfilename):
+    """
+    Writes pd.Dataframe as new SQLite database (see upsert_sqlite); an existing database is replaced.
+    """
+    if os.path.isfile(outfilename):
+        os.remove(outfilename)
+    upsert_sqlite(df, outfilename)
+
+
+def main(infilename, outfilename, columns=None):
+    """
+    Exports pd.Dataframe to SQLite database.
+
+    Parameters
+    ---------
+    infilename : str
+        Filename of pd.Dataframe (.parquet, .feather/.arrow or pickle, see DataFrameFile).
+    outfilename : str
+        Filename to save the SQLite database to.
+    columns : list of str or None
+        If given, only these cols are exported (and read from parquet/arrow files); STATE and ID are always exported.
+    """
+    if columns is not None:
+        columns = list(dict.fromkeys(KEY_COLS + columns))
+    df = DataFrameFile.load_dataframe(infilename, columns=columns)
+
+    write_sqlite(df, outfilename)
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-i", "--infilename", help="pd.Dataframe (.parquet, .feather/.arrow or pickle) containing nuclear tests from johnston archive", required=True)
+    parser.add_argument("-o", "--outfilename", help="SQLite database to save the tests to", required=True)
+    parser.add_argument("-c", "--columns", help="comma separated cols to export, e.g. DATETIME,LAT,LONG,YIELD,TYPE; STATE and ID are always exported; default all", required=False)
+
+    args = parser.parse_args()
+
+    main(args.infilename, args.outfilename, None if args.columns is None else args.columns.split(","))
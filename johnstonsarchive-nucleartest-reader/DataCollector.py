@@ -0,0 +1,148 @@
+
+import numpy as np
+import pandas as pd
+
+
+def is_missing(values):
+    """Helper function to find missing entries (None, NaN, NaT, NA) in a col of any dtype.
+
+    Parameters
+    ---------
+    values : np.array or pd.api.extensions.ExtensionArray
+        col values
+
+    Returns
+    -------
+    missing : np.array of bool
+    """
+    if isinstance(values, np.ndarray) and values.dtype.kind in "fcmM":
+        return np.isnan(values)
+    if isinstance(values, np.ndarray) and values.dtype.kind in "iub":
+        return np.zeros(len(values), dtype=bool)
+    return np.asarray(pd.isna(values))
+
+
+def get_kind(values):
+    """Helper function to get the kind of a col: "C" for categoricals, otherwise the numpy kind (also for nullable ints and booleans)."""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return "C"
+    return values.dtype.kind
+
+
+def to_numpy(values, dtype, na_value):
+    """Helper function to convert a col to a numpy array of dtype, with missing entries set to na_value."""
+    if isinstance(values, pd.api.extensions.ExtensionArray):
+        return values.to_numpy(dtype=dtype, na_value=na_value)
+    values = values.astype(dtype)
+    if na_value is not None:
+        values[is_missing(values)] = na_value
+    return values
+
+
+def unify_col(chunks):
+    """Helper function to concatenate the chunks of one col and to find one common dtype for them.
+
+    Chunks without the col are given as None. Rules: ints stay ints (nullable Int64 if there are missing entries), ints and floats become floats, bools stay bools with missing entries set to False (as the reader does for empty CRAT/VENT cells), datetimes become datetime64[ns] with NaT, a col with categoricals in any chunk becomes categorical, python objects in numeric or datetime cols (e.g. numbers as strings or datetimes from yaml) are converted, everything else becomes an object col with None for missing entries.
+
+    Parameters
+    ---------
+    chunks : list of (np.array or pd.api.extensions.ExtensionArray or None, int)
+        values of col in each chunk (None if chunk does not have the col) and number of rows of chunk
+
+    Returns
+    -------
+    values : np.array, pd.api.extensions.ExtensionArray or pd.Series
+        concatenated col (object cols as pd.Series, so pandas does not infer another dtype for them).
+    """
+    present = [values for (values, _) in chunks if values is not None]
+    has_missing = len(present) < len(chunks) or any(is_missing(values).any() for values in present)
+    kinds = {get_kind(values) for values in present if not is_missing(values).all()}
+
+    if "C" in kinds:
+        values = unify_col([(values if values is None else np.asarray(values, dtype=object), n) for (values, n) in chunks])
+        return pd.Categorical(values)
+
+    if "O" in kinds and len(kinds) > 1:
+        convert = pd.to_datetime if "M" in kinds else pd.to_numeric
+        try:
+            chunks = [(values if values is None or get_kind(values) != "O" else np.asarray(convert(values)), n) for (values, n) in chunks]
+            return unify_col(chunks)
+        except (ValueError, TypeError):
+            pass
+
+    if kinds and kinds <= set("iu"):
+        if not has_missing and all(isinstance(values, np.ndarray) for values in present):
+            return np.concatenate(present).astype("int64")
+        return pd.array(np.concatenate([to_numpy(values, "float64", np.nan) if values is not None else np.full(n, np.nan) for (values, n) in chunks]), dtype="Int64")
+
+    if kinds and kinds <= set("iuf"):
+        return np.concatenate([to_numpy(values, "float64", np.nan) if values is not None else np.full(n, np.nan) for (values, n) in chunks])
+
+    if kinds == {"b"}:
+        return np.concatenate([to_numpy(values, bool, False) if values is not None else np.zeros(n, dtype=bool) for (values, n) in chunks])
+
+    if kinds == {"M"}:
+        return np.concatenate([values.astype("datetime64[ns]") if values is not None else np.full(n, np.datetime64("NaT", "ns")) for (values, n) in chunks])
+
+    values = np.concatenate([np.asarray(values, dtype=object) if values is not None else np.full(n, None) for (values, n) in chunks])
+    values[is_missing(values)] = None
+    return pd.Series(values, dtype=object)
+
+
+class DataCollector():
+    """ Class to collect tables as chunks of cols and to build one dataframe from all of them at the end.
+
+    Growing a dataframe with pd.concat inside a loop copies all rows collected so far in every iteration. The collector only keeps references to the chunks, and concatenates each col once in get_dataframe(), where also one common dtype per col is chosen (see unify_col).
+
+    Attributes
+    ----------
+    chunks_ : list of (dict, int)
+        Collected chunks: dict with col names as keys and np.arrays (or pandas extension arrays, e.g. categoricals) as values, and number of rows.
+    """
+
+    def __init__(self):
+        self.chunks_ = []
+
+    def add_columns(self, cols):
+        """
+            Adds one chunk given as dict of cols (col names as keys, equally long arrays or lists as values).
+        """
+        cols = {descr: values if isinstance(values, pd.api.extensions.ExtensionArray) else np.asarray(values) for (descr, values) in cols.items()}
+        cols = {descr: values.astype(object) if values.dtype.kind in "US" else values for (descr, values) in cols.items()}
+        n_rows = len(next(iter(cols.values()))) if cols else 0
+        assert all(len(values) == n_rows for values in cols.values()), "[ERROR] All cols of a chunk need the same length."
+        self.chunks_ += [(cols, n_rows)]
+
+    def add_dataframe(self, df):
+        """
+            Adds one chunk given as pd.Dataframe.
+        """
+        cols = {}
+        for descr in df.columns:
+            # keeps categoricals and nullable ints/booleans, everything else as np.array
+            is_extension = isinstance(df[descr].dtype, pd.api.extensions.ExtensionDtype) and not isinstance(df[descr].dtype, pd.StringDtype)
+            cols[descr] = df[descr].array if is_extension else df[descr].to_numpy()
+        self.add_columns(cols)
+
+    def add_collector(self, collector):
+        """
+            Adds all chunks of another collector.
+        """
+        self.chunks_ += collector.chunks_
+
+    def set_constant_column(self, descr, value):
+        """
+            Sets col descr to the same value in all rows of all chunks collected so far (e.g. the state), as categorical.
+        """
+        for (cols, n) in self.chunks_:
+            cols[descr] = pd.Categorical.from_codes(np.zeros(n, dtype=int), categories=[value])
+
+    def get_n_rows(self):
+        return sum(n for (_, n) in self.chunks_)
+
+    def get_dataframe(self):
+        """
+            Builds the dataframe of all collected chunks. Cols appear in the order in which they are first found in the chunks.
+        """
+        descrs = list(dict.fromkeys(descr for (cols, _) in self.chunks_ for descr in cols))
+        return pd.DataFrame({descr: unify_col([(cols.get(descr), n) for (cols, n) in self.chunks_]) for descr in descrs})
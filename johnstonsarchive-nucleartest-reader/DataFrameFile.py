@@ -0,0 +1,173 @@
+
+import pickle
+
+import numpy as np
+import pandas as pd
+
+
+COLUMNAR_FORMATS = {".parquet": "parquet", ".feather": "feather", ".arrow": "feather"}
+
+
+def get_format(filename):
+    """Helper function to get the format of a dataframe file from its extension: "parquet" (.parquet), "feather" (Arrow IPC, .feather or .arrow) or "pickle" (anything else)."""
+    for (extension, fmt) in COLUMNAR_FORMATS.items():
+        if filename.endswith(extension):
+            return fmt
+    return "pickle"
+
+
+def is_columnar(filename):
+    return get_format(filename) != "pickle"
+
+
+def import_pyarrow():
+    """Helper function to import pyarrow, which is only needed for the columnar formats."""
+    try:
+        import pyarrow
+    except ImportError:
+        assert False, "[ERROR] Parquet and Arrow files need pyarrow (pip install pyarrow); use a .pkl filename to write a pickle instead."
+    return pyarrow
+
+
+def to_object_col(values):
+    """Helper function to convert a col read from an Arrow table (str dtype or categorical of strings) back to the object col with None for missing entries that the reader builds."""
+    values = np.asarray(values, dtype=object)
+    values[pd.isna(values)] = None
+    return pd.Series(values, dtype=object)
+
+
+def from_dictionary(values):
+    """Helper function to convert a dictionary-encoded Arrow array of strings to an object col with None for missing entries."""
+    strings = np.append(np.asarray(values.dictionary.to_pylist(), dtype=object), None)
+    codes = values.indices.fill_null(-1).to_numpy(zero_copy_only=False)
+    return pd.Series(strings[codes], dtype=object)
+
+
+def to_arrow_table(df):
+    """
+    Helper function to convert a dataframe to an Arrow table with dictionary-encoded string cols.
+
+    Only dataframes that load_dataframe gives back unchanged are converted: the index has to be the default one (0, 1, ...), and each object col has to hold one type of scalars (strings, numbers or bools, with None or NaN for missing entries). Anything else (e.g. numbers and strings mixed, tuples or dicts) fails with the names of the cols; convert such cols before saving, or save as pickle.
+    """
+    pa = import_pyarrow()
+
+    assert df.index.equals(pd.RangeIndex(len(df))), "[ERROR] Parquet and Arrow files do not keep the index; reset it before saving (df.reset_index(drop=True)) or save as pickle."
+
+    mixed = []
+    for descr in df.columns:
+        if df[descr].dtype != object:
+            continue
+        try:
+            arr = pa.array(df[descr].to_numpy(), from_pandas=True)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            mixed += [descr]
+            continue
+        if pa.types.is_nested(arr.type):
+            mixed += [descr]
+    assert len(mixed) == 0, f"[ERROR] Object cols {mixed} have mixed types or nested values, which Parquet and Arrow files can not store as they are; convert them (e.g. to strings or json) before saving, or save as pickle."
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    for (i, field) in enumerate(table.schema):
+        if pa.types.is_string(field.type) or pa.types.is_large_string(field.type):
+            table = table.set_column(i, field.name, table.column(i).dictionary_encode())
+    return table
+
+
+def save_dataframe(df, filename):
+    """
+    Saves a dataframe, in the format given by the extension of filename (see get_format).
+
+    Parquet and Arrow files store each col on its own and string cols dictionary-encoded, i.e. every distinct string only once; load_dataframe can then read only some of the cols. Everything else is pickled as before.
+
+    Parameters
+    ---------
+    df : pd.DataFrame
+        data to save
+    filename : str
+        Filename to save the dataframe to.
+    """
+    fmt = get_format(filename)
+
+    if fmt == "pickle":
+        with open(filename, 'wb') as file:
+            pickle.dump(df, file)
+        return
+
+    import_pyarrow()
+    import pyarrow.parquet
+    import pyarrow.feather
+
+    table = to_arrow_table(df)
+    if fmt == "parquet":
+        pyarrow.parquet.write_table(table, filename, use_dictionary=True, compression="zstd")
+    else:
+        pyarrow.feather.write_feather(table, filename, compression="zstd")
+
+
+def load_dataframe(filename, columns=None):
+    """
+    Loads a dataframe saved by save_dataframe (or any pickled pd.Dataframe).
+
+    Parameters
+    ---------
+    filename : str
+        Filename of the dataframe; the format is given by its extension (see get_format).
+    columns : list of str or None
+        If given, only these cols are returned. Parquet and Arrow files only read these cols from disk, pickles are loaded as a whole.
+
+    Returns
+    -------
+    df : pd.DataFrame
+        Dataframe with the same dtypes as the saved one: string cols as object cols with None for missing entries (or as str cols, if they were saved as such), categoricals with object categories.
+    """
+    fmt = get_format(filename)
+
+    if fmt == "pickle":
+        with open(filename, 'rb') as file:
+            df = pickle.load(file)
+        if columns is not None:
+            missing = [descr for descr in columns if descr not in df.columns]
+            assert len(missing) == 0, f"[ERROR] Cols {missing} not in {filename}."
+            df = df[list(columns)]
+        return df
+
+    pa = import_pyarrow()
+    import pyarrow.parquet
+    import pyarrow.feather
+
+    if fmt == "parquet":
+        schema = pyarrow.parquet.read_schema(filename)
+    else:
+        schema = pyarrow.feather.read_table(filename, memory_map=True).schema
+    if columns is not None:
+        missing = [descr for descr in columns if descr not in schema.names]
+        assert len(missing) == 0, f"[ERROR] Cols {missing} not in {filename}."
+
+    if fmt == "parquet":
+        table = pyarrow.parquet.read_table(filename, columns=columns)
+    else:
+        table = pyarrow.feather.read_table(filename, columns=columns, memory_map=True)
+
+    # pandas types of the saved cols, e.g. "unicode" for object cols that were dictionary-encoded
+    pandas_types = {col["name"]: col["pandas_type"] for col in (schema.pandas_metadata or {}).get("columns", [])}
+    # "str" for cols that had the pandas string dtype instead of object
+    numpy_types = {col["name"]: col["numpy_type"] for col in (schema.pandas_metadata or {}).get("columns", [])}
+
+    # object cols are built from the dictionary of each col, so every distinct string becomes a python object only once
+    objects = {}
+    table = table.unify_dictionaries()
+    for descr in table.column_names:
+        if pa.types.is_dictionary(table.schema.field(descr).type) and pandas_types.get(descr) != "categorical":
+            objects[descr] = from_dictionary(table.column(descr).combine_chunks())
+            if numpy_types.get(descr) == "str":
+                objects[descr] = objects[descr].astype("str")
+
+    others = table.drop_columns(list(objects)).to_pandas()
+    for descr in others.columns:
+        if isinstance(others[descr].dtype, pd.CategoricalDtype) and isinstance(others[descr].cat.categories.dtype, pd.StringDtype):
+            categories = others[descr].cat.categories
+            others[descr] = pd.Categorical.from_codes(others[descr].cat.codes, categories=pd.Index(categories.to_numpy(dtype=object), dtype=object))
+        elif isinstance(others[descr].dtype, pd.StringDtype) and numpy_types.get(descr) != "str":
+            others[descr] = to_object_col(others[descr])
+
+    return pd.DataFrame({descr: objects[descr] if descr in objects else others[descr] for descr in table.column_names})
@@ -0,0 +1,130 @@
+
+import os
+import json
+import time
+import hashlib
+import urllib.error
+import urllib.request
+
+
+class HttpCache():
+    """ Class to keep downloaded html files on disk and only download them again if they changed on the server.
+
+    Each url is stored as two files in the cache folder, named by the hash of the url: the raw body and a json with the url, ETag, Last-Modified and timestamps. Cached urls are revalidated with conditional GETs (If-None-Match/If-Modified-Since); the server then only sends the body if it changed.
+
+    Attributes
+    ----------
+    cachedir_ : str
+        Folder with the cached files.
+    offline_ : bool
+        If True, never touches the network and only serves cached bodies.
+    fresh_for_ : float
+        Time in seconds after the last validation in which a cached body is served without revalidation.
+    max_age_ : float or None
+        Entries not used for longer than this time in seconds are removed by evict().
+    max_size_ : int or None
+        Maximum total size of the cached bodies in bytes; least recently used entries are removed by evict().
+    """
+
+    def __init__(self, cachedir, offline=False, fresh_for=0., max_age=None, max_size=None):
+        self.cachedir_ = cachedir
+        self.offline_ = offline
+        self.fresh_for_ = fresh_for
+        self.max_age_ = max_age
+        self.max_size_ = max_size
+        os.makedirs(cachedir, exist_ok=True)
+
+    def get_paths(self, url):
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return (os.path.join(self.cachedir_, f"{key}.body"), os.path.join(self.cachedir_, f"{key}.json"))
+
+    def load_entry(self, url):
+        """
+            Returns the meta data of the cached url or None, if it is not cached.
+        """
+        (body_path, meta_path) = self.get_paths(url)
+        if not (os.path.isfile(body_path) and os.path.isfile(meta_path)):
+            return None
+        with open(meta_path, 'r') as file:
+            return json.load(file)
+
+    def save_entry(self, url, meta, body=None):
+        """
+            Writes meta data (and body, if given) of url to the cache. Files are replaced atomically, so concurrent readers never see half written files.
+        """
+        (body_path, meta_path) = self.get_paths(url)
+        if body is not None:
+            with open(f"{body_path}.tmp", 'wb') as file:
+                file.write(body)
+            os.replace(f"{body_path}.tmp", body_path)
+        with open(f"{meta_path}.tmp", 'w') as file:
+            json.dump(meta, file)
+        os.replace(f"{meta_path}.tmp", meta_path)
+
+    def read_body(self, url):
+        (body_path, _) = self.get_paths(url)
+        with open(body_path, 'rb') as file:
+            return file.read()
+
+    def get(self, url):
+        """
+            Returns the body of url, from the cache if possible. Downloads it only if it is not cached or changed on the server.
+        """
+        meta = self.load_entry(url)
+        now = time.time()
+
+        if self.offline_:
+            assert meta is not None, f"[ERROR] Offline mode, but {url} is not in cache {self.cachedir_}."
+            meta["accessed"] = now
+            self.save_entry(url, meta)
+            return self.read_body(url)
+
+        if meta is not None and now - meta["validated"] < self.fresh_for_:
+            meta["accessed"] = now
+            self.save_entry(url, meta)
+            return self.read_body(url)
+
+        headers = {}
+        if meta is not None and meta["etag"] is not None:
+            headers["If-None-Match"] = meta["etag"]
+        if meta is not None and meta["last_modified"] is not None:
+            headers["If-Modified-Since"] = meta["last_modified"]
+
+        try:
+            with urllib.request.urlopen(urllib.request.Request(url, headers=headers)) as response:
+                body = response.read()
+                (etag, last_modified) = (response.headers.get("ETag"), response.headers.get("Last-Modified"))
+        except urllib.error.HTTPError as e:
+            if e.code != 304 or meta is None:
+                raise
+            meta["validated"] = meta["accessed"] = now
+            self.save_entry(url, meta)
+            return self.read_body(url)
+
+        meta = {"url": url, "etag": etag, "last_modified": last_modified, "size": len(body), "validated": now, "accessed": now}
+        self.save_entry(url, meta, body)
+        return body
+
+    def evict(self):
+        """
+            Removes entries not used for longer than max_age_ and then least recently used entries until the cached bodies fit into max_size_.
+        """
+        entries = []
+        for f in os.listdir(self.cachedir_):
+            if not f.endswith(".json"):
+                continue
+            with open(os.path.join(self.cachedir_, f), 'r') as file:
+                entries += [json.load(file)]
+        entries.sort(key=lambda meta: meta["accessed"], reverse=True)
+
+        now = time.time()
+        total_size = 0
+        for meta in entries:
+            too_old = self.max_age_ is not None and now - meta["accessed"] > self.max_age_
+            too_large = self.max_size_ is not None and total_size + meta["size"] > self.max_size_
+            if too_old or too_large:
+                for path in self.get_paths(meta["url"]):
+                    os.remove(path)
+                print(f"[INFO] Removed {meta['url']} from cache.")
+            else:
+                total_size += meta["size"]
@@ -1,32 +1,352 @@
 
+import io
+import re
+import os
+import mmap
 import numpy as np
 import pandas as pd
+import urllib.parse
 import urllib.request
 
+import time
+import itertools
+import collections
 import pprint
+import threading
+import concurrent.futures
 
 
-def make_extended_array(arr, descr_to_add):
-    """Helper function to create new array with entries of existing array plus new empty cols. 
+# Cols of the table that are parsed by the cleaning stages: the table entry is kept as <col>_orig, and these cols are added (in this order) 
+PARSED_COLS = {
+    "YIELD": [('YIELD', 'float'), ('YIELD_value_remark', 'object')],
+    "YD-EST": [('YD-EST', 'float'), ('YD-EST_value_remark', 'object')],
+    "CRAT": [('CRAT', 'float'), ('CRAT_occured', 'bool'), ('CRAT_value_remark', 'object')],
+    "VENT": [('VENT', 'float'), ('VENT_occured', 'bool'), ('VENT_value_remark', 'object')],
+}
+
+# Cols with few different codes; returned as categoricals by get_columns
+CATEGORICAL_COLS = ["SHOTTYPE", "MON", "SITE", "NT-LONG", "NT-GZALT", "TYPE", "PUR", "NT-YD", "DEVICE", "SPONSOR", "R", "N",
+    "YIELD_value_remark", "YD-EST_value_remark", "CRAT_value_remark", "VENT_value_remark"]
+
+
+# Month names as given in the MON col
+MONTH_NAMES = np.array(["JAN", "FEB", "MAR", "APR", "MAY", "JUN", "JUL", "AUG", "SEP", "OCT", "NOV", "DEC"], dtype=object)
+
+# Multipliers of the unit prefixes in table entries (e.g. VENT given as 15kCi)
+UNIT_MULTIPLIERS = {"k": 1e3, "M": 1e6}
+
+
+def make_quantity_pattern(flag="", unit="", multipliers=()):
+    """Helper function to build the regex of the shared grammar for table entries with a quantity and qualifiers:
+
+        [flag] [< or >] [number] [multiplier][unit] [?]
+
+    e.g. "V <2.5kCi", "C", "?" or "<1000". All parts are optional; the named groups are read out by parse_quantities. 
+
+    Parameters
+    ---------
+    flag : str
+        letter marking that something occured (e.g. "V" for VENT); "" if the col has none
+    unit : str
+        unit that may follow the number (e.g. "Ci" for VENT); "" if the col has none
+    multipliers : list of str
+        allowed unit prefixes, keys of UNIT_MULTIPLIERS
+
+    Returns
+    -------
+    pattern : re.Pattern
+    """
+    flag = re.escape(flag)
+    multipliers = "|".join(re.escape(m) for m in multipliers)
+    unit = re.escape(unit)
+    return re.compile(rf"^(?P<flag>{flag})?\s*(?P<limit>[<>])?\s*(?P<number>-?(?:\d+\.?\d*|\.\d+))?\s*(?P<multiplier>{multipliers})?(?:{unit})?\s*(?P<uncertain>\?)?$")
+
+
+# Grammars of the cols with quantities
+QUANTITY_PATTERNS = {
+    "VENT": make_quantity_pattern(flag="V", unit="Ci", multipliers=UNIT_MULTIPLIERS),
+    "CRAT": make_quantity_pattern(flag="C"),
+    "YIELD": make_quantity_pattern(),
+    "YD-EST": make_quantity_pattern(),
+}
+
+
+def parse_quantities(values, pattern):
+    """Helper function to parse a whole col of table entries with a quantity grammar (see make_quantity_pattern) at once.
+
+    Parameters
+    ---------
+    values : np.array
+        col values (object, None for empty cells)
+    pattern : re.Pattern
+        grammar of the col
+
+    Returns
+    -------
+    parsed : dict of np.array
+        "value": number times multiplier (NaN if not given), "occured": whether the flag is given, "remark": "<" or ">" for limits, "?" for uncertain entries, otherwise None, "valid": whether the entry is empty or follows the grammar.
+    """
+    # match the grammar only once per distinct entry (cols repeat few entries like "V" or "C") and spread the results to all rows with the codes; empty cells get code -1
+    (codes, entries) = pd.factorize(values)
+    matches = [pattern.match(entry) for entry in entries]
+    given = codes >= 0
+
+    number = np.array([float(m["number"]) if m and m["number"] else np.nan for m in matches], dtype=float)
+    multiplier = np.array([UNIT_MULTIPLIERS[m["multiplier"]] if m and m["multiplier"] else 1. for m in matches], dtype=float)
+    remark = np.array([(m["limit"] or ("?" if m["uncertain"] else None)) if m else None for m in matches], dtype=object)
+
+    parsed = {
+        "value": np.full(len(values), np.nan),
+        "occured": np.zeros(len(values), dtype=bool),
+        "remark": np.full(len(values), None, dtype=object),
+        "valid": ~given,
+    }
+    parsed["value"][given] = (number * multiplier)[codes[given]]
+    parsed["occured"][given] = np.array([bool(m and m["flag"]) for m in matches], dtype=bool)[codes[given]]
+    parsed["remark"][given] = remark[codes[given]]
+    parsed["valid"][given] = np.array([m is not None for m in matches], dtype=bool)[codes[given]]
+    return parsed
+
+
+def make_empty_array(n_rows, descr):
+    """Helper function to allocate a structured array with all cols set to empty values (None, NaN, NaT, False). 
     
     Parameters
     ---------
-    arr : np.array 
-        existing array that is base for new array. 
-    descr_to_add : list
-        description and type of empty cols to add, e.g. [('TITLE', 'float')] 
+    n_rows : int
+        number of rows
+    descr : list
+        description and type of cols, e.g. [('TITLE', 'float')] 
     
     Returns
     -------
-    new_arr : np.array
-        new array with entries of existing array plus new empty cols. 
+    arr : np.array
+        new structured array. 
+    """
+    arr = np.empty(n_rows, dtype=np.dtype(descr))
+    empty_values = {"f": np.nan, "M": np.datetime64("NaT", "ns"), "b": False, "O": None}
+    for name in arr.dtype.names:
+        arr[name] = empty_values[arr.dtype[name].kind]
+    return arr
+
+
+def slice_fixed_width_columns(lines, col_indices):
+    """Helper function to cut all cols out of all lines of a fixed-width table at once.
+
+    The lines are padded into one fixed-width unicode array, which is viewed as a 2D array of code points. Each col is then a single slice of that array, so the work scales with the number of cols instead of rows x cols.
+
+    Parameters
+    ---------
+    lines : list of str
+        lines of the table
+    col_indices : list of (int, int)
+        (start, end) of each col in the lines
+
+    Returns
+    -------
+    cols : list of np.array
+        one object array per col with the stripped values (None for empty cells).
+    """
+    width = max(end for (_, end) in col_indices)
+    codepoints = np.array(lines, dtype=f"U{width}").view(np.uint32).reshape(len(lines), width)
+    return slice_codepoints(codepoints, col_indices)
+
+
+def slice_codepoints(codepoints, col_indices):
+    """Helper function to cut the cols out of the table lines given as 2D array of code points (uint32, or uint8 for ASCII; one row per line, 0 after the end of a line); see slice_fixed_width_columns and slice_fixed_width_bytes."""
+    cols = []
+    for (start, end) in col_indices:
+        if end <= start:
+            cols += [np.full(len(codepoints), None, dtype=object)]
+            continue
+        cells = np.ascontiguousarray(codepoints[:, start:end], dtype=np.uint32).view(f"U{end - start}").ravel()
+        cells = np.strings.strip(cells)
+        empty = np.strings.str_len(cells) == 0
+        cells = cells.astype(object)
+        cells[empty] = None
+        cols += [cells]
+    return cols
+
+
+def find_line_bounds(buffer):
+    """Helper function to find the lines of a raw body without decoding it.
+
+    Parameters
+    ---------
+    buffer : bytes-like object
+        raw body, e.g. a memory-mapped file, with \\n or \\r\\n line ends
+
+    Returns
+    -------
+    (starts, ends) : (np.array of int, np.array of int)
+        byte offsets of the start and end (without line end) of each line, as for body.splitlines().
+    """
+    b = np.frombuffer(buffer, dtype=np.uint8)
+    newlines = np.flatnonzero(b == ord("\n"))
+    starts = np.concatenate([[0], newlines + 1])
+    ends = np.concatenate([newlines, [len(b)]])
+    if len(b) == 0 or b[-1] == ord("\n"): # no line after the last line end
+        (starts, ends) = (starts[:-1], ends[:-1])
+    cr = (ends > starts) & (b[np.maximum(ends - 1, 0)] == ord("\r")) if len(b) > 0 else np.zeros(0, dtype=bool)
+    ends[cr] -= 1
+    return (starts, ends)
+
+
+def slice_fixed_width_bytes(buffer, starts, ends, col_indices, block_size=4096):
+    """Helper function to cut all cols of a fixed-width table directly out of a raw body (counterpart of slice_fixed_width_columns). Only the bytes up to the end of the last col are gathered and decoded, the rest of the body is never decoded. Needs ASCII lines: the col indices count characters, and ASCII bytes are decoded by taking them as code points.
+
+    Parameters
+    ---------
+    buffer : bytes-like object
+        raw body, e.g. a memory-mapped file
+    starts, ends : np.array of int
+        byte offsets of start and end of the table lines (see find_line_bounds)
+    col_indices : list of (int, int)
+        (start, end) of each col in the lines
+    block_size : int
+        number of lines gathered at once
+
+    Returns
+    -------
+    cols : list of np.array
+        one object array per col with the stripped values (None for empty cells).
+    """
+    b = np.frombuffer(buffer, dtype=np.uint8)
+    width = max(end for (_, end) in col_indices)
+
+    # gather the first width bytes of each line, in blocks of lines to keep the offsets small; bytes after the end of a line are 0
+    codepoints = np.zeros((len(starts), width), dtype=np.uint8)
+    for i in range(0, len(starts), block_size):
+        offsets = starts[i:i + block_size, None] + np.arange(width, dtype=starts.dtype)[None, :]
+        codepoints[i:i + block_size] = b.take(offsets, mode='clip')
+        codepoints[i:i + block_size][offsets >= ends[i:i + block_size, None]] = 0
+    return slice_codepoints(codepoints, col_indices)
+
+
+def is_local_url(url):
+    """Helper function to check whether url is a local file (file:// url or path)."""
+    return urllib.parse.urlsplit(url).scheme in ["", "file"]
+
+
+def url_to_path(url):
+    """Helper function to get the path of a local file from a file:// url or path."""
+    if urllib.parse.urlsplit(url).scheme == "file":
+        return urllib.request.url2pathname(urllib.parse.urlsplit(url).path)
+    return url
+
+
+def is_unexpected(values, codes):
+    """Helper function to find the given entries of a col that are not among its expected codes (e.g. because they spilled over from the col before). 
+
+    Parameters
+    ---------
+    values : np.array
+        col values (object, None for empty cells)
+    codes : list of str
+        expected codes of the col
+
+    Returns
+    -------
+    unexpected : np.array of bool
+    """
+    return ~(pd.isna(values) | pd.Series(values).isin(codes).to_numpy())
+
+
+def fetch_url(url, cache=None):
+    """Helper function to download the raw body of a url.
+
+    Parameters
+    ---------
+    url : str
+        url to download (http(s):// or file://)
+    cache : HttpCache or None
+        if given, the body is taken from this cache and only downloaded if it changed
+
+    Returns
+    -------
+    body : bytes
+        raw body of the response.
+    """
+    if cache is not None:
+        return cache.get(url)
+    with urllib.request.urlopen(url) as response:
+        return response.read()
+
+
+def iter_table_lines(stream, firstline=0, lastline=-1, encoding="utf-8"):
+    """Helper function to read the lines [firstline:lastline] of a binary stream one at a time, without keeping the whole body in memory. 
+
+    Gives the same lines as body.decode(encoding).splitlines()[firstline:lastline] for bodies with \\n, \\r\\n or \\r line ends. A negative lastline needs a buffer of the last -lastline lines; with a positive lastline, the stream is not read further than needed.
+
+    Parameters
+    ---------
+    stream : binary file-like object
+        e.g. an http response (urllib.request.urlopen) or a file opened with 'rb'
+    firstline, lastline : int
+        range of the lines to read, as for slicing a list (lastline None for all lines until the end)
+    encoding : str
+        encoding of the stream
+
+    Yields
+    -------
+    line : str
+        line without line end.
+    """
+    assert firstline >= 0, "[ERROR] Streaming needs a firstline counted from the start."
+    lines = (line.rstrip("\n") for line in io.TextIOWrapper(stream, encoding=encoding, newline=None))
+    lines = itertools.islice(lines, firstline, lastline if lastline is None or lastline >= 0 else None)
+    if lastline is None or lastline >= 0:
+        yield from lines
+        return
+    # hold back the last -lastline lines, as they are not part of the table
+    buffer = collections.deque()
+    for line in lines:
+        buffer.append(line)
+        if len(buffer) > -lastline:
+            yield buffer.popleft()
+
+
+def fetch_urls(urls, max_in_flight=4, max_per_host=2, min_delay_per_host=0., cache=None):
+    """Helper function to download several urls concurrently. Each url is downloaded only once, even if listed several times.
+
+    Parameters
+    ---------
+    urls : list of str
+        urls to download
+    max_in_flight : int
+        maximum number of downloads running at the same time
+    max_per_host : int
+        maximum number of downloads running at the same time for one host
+    min_delay_per_host : float
+        minimum time in seconds between the starts of two downloads from one host
+    cache : HttpCache or None
+        if given, bodies are taken from this cache and only downloaded if they changed
+
+    Returns
+    -------
+    bodies : dict
+        raw bodies (bytes) of the responses, with the urls as keys.
     """
+    urls = list(dict.fromkeys(urls))
+    hosts = {urllib.parse.urlsplit(url).netloc for url in urls}
+    host_slots = {host: threading.Semaphore(max_per_host) for host in hosts}
+    host_locks = {host: threading.Lock() for host in hosts}
+    host_last_start = {host: -float("inf") for host in hosts}
+
+    def polite_fetch(url):
+        host = urllib.parse.urlsplit(url).netloc
+        with host_slots[host]:
+            with host_locks[host]:
+                wait = host_last_start[host] + min_delay_per_host - time.monotonic()
+                if wait > 0:
+                    time.sleep(wait)
+                host_last_start[host] = time.monotonic()
+            return fetch_url(url, cache)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+        bodies = dict(zip(urls, executor.map(polite_fetch, urls)))
 
-    new_dt = np.dtype(arr.dtype.descr + descr_to_add)
-    new_arr = np.zeros(arr.shape, dtype=new_dt)
-    for (descr, dt) in arr.dtype.descr:
-        new_arr[descr] = arr[descr]
-    return new_arr
+    return bodies
 
 
 class JohnstonarchiveReader():
@@ -37,9 +357,11 @@ class JohnstonarchiveReader():
     col_parameters_ : dict
         Nested dictionary. Keys: names/description for each col in table. Values: dicts with keys (1) "indices" (list of (int,int)) corresponding to the table cols (start, end of col)) and (2) "dtypes" (list of types) for reading the table col values. 
     data_ : numpy array
-        Structured array of extracted data. Description contains the keys from col_parameters_ and corresponding dtypes. 
+        Structured array of extracted data. Description is planned up front by get_output_descr: the keys from col_parameters_ (parsed cols renamed to <col>_orig), the cols added by the cleaning stages, and DATETIME. 
     statename_ : str
         Name of state the data belongs to. 
+    corrections_ : dict
+        Nested dictionary of corrections of single table entries. Keys: (statename, ID). Values: dicts with col names as keys and dicts as values with keys (1) "orig" (replaces the table entry before parsing) and/or (2) "value", "remark", "occured" (replace the parsed values). 
     firstline_ : int
         Line number of first line in table at url
     lastline_ : int
@@ -48,8 +370,10 @@ class JohnstonarchiveReader():
 
     def __init__(self, statename = ""): 
         self.col_parameters_ = {}
+        self.corrections_ = {}
         self.data_ = []
         self.statename_ = statename
+        self.sliced_ = None
 
     def set_table_params(self, url, firstline=0, lastline=-1):
         self.url_ = url
@@ -64,28 +388,100 @@ class JohnstonarchiveReader():
         self.col_parameters_[col_description]["indices"] = (str_index_start, str_index_end)
         self.col_parameters_[col_description]["dtype"] = col_datatype
 
-    def read_from_url(self):
-        body = urllib.request.urlopen(self.url_).read()
+    def add_correction(self, test_id, col_description, correction):
+        assert set(correction) <= {"orig", "value", "remark", "occured"}, f"[ERROR] Unknown correction {correction} for ID {test_id}."
+        self.corrections_.setdefault((self.statename_, test_id), {})[col_description] = correction
+
+    def get_correction(self, test_id, col_description):
+        """
+            Returns the correction of the table entry in col for test ID, or None if there is none.
+        """
+        return self.corrections_.get((self.statename_, test_id), {}).get(col_description)
+
+    def apply_value_correction(self, d, col_description):
+        """
+            Sets the parsed value (and remark and occured, if given) of col in row d from the corrections. Returns False if there is no such correction. 
+        """
+        correction = self.get_correction(d["ID"], col_description)
+        if correction is None or "value" not in correction:
+            return False
+        print(f"[INFO] (ID {d["ID"]}): ('{d[f"{col_description}_orig"]}') => ('{correction["value"]}') for {col_description}.")
+        d[col_description] = correction["value"]
+        d[f"{col_description}_value_remark"] = correction.get("remark")
+        if "occured" in correction:
+            d[f"{col_description}_occured"] = correction["occured"]
+        return True
+
+    def read_from_url(self, cache=None):
+        self.read_from_body(fetch_url(self.url_, cache))
+
+    def read_from_file(self):
+        """
+            Memory-maps the local html file at url (file:// url or path) and cuts the cols of the table lines directly out of the mapped bytes, so only the cells are decoded. The col params must be set before. The mapping and the file are closed again before returning; read_data then takes the cut cols. Falls back to decoding the table lines (as read_from_body) if they are not ASCII or have bare \\r line ends.
+        """
+        assert is_local_url(self.url_), f"[ERROR] {self.url_} is not a local file."
+        with open(url_to_path(self.url_), 'rb') as file:
+            if os.fstat(file.fileno()).st_size == 0:
+                self.read_from_body(b"")
+                return
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                sliced = self.slice_mapped_table(mapped)
+                body = mapped[:] if sliced is None else None
+
+        if sliced is None:
+            self.read_from_body(body)
+            return
+        self.sliced_ = sliced
+        self.decoded_body_ = None
+
+    def slice_mapped_table(self, mapped):
+        """
+            Cuts the cols out of the table lines of a memory-mapped file. Returns the cols and the number of lines, or None if the table lines are not ASCII or have bare \\r line ends. No views of the mapping are kept, so it can be closed afterwards.
+        """
+        b = np.frombuffer(mapped, dtype=np.uint8)
+        (starts, ends) = find_line_bounds(mapped)
+        (starts, ends) = (starts[self.firstline_:self.lastline_], ends[self.firstline_:self.lastline_])
+
+        table = b[starts[0]:ends[-1]] if len(starts) > 0 else b[:0]
+        bare_cr = (b == ord("\r")).sum() != ((b[:-1] == ord("\r")) & (b[1:] == ord("\n"))).sum()
+        if (table >= 128).any() or bare_cr:
+            return None
+
+        col_indices = [par_dict["indices"] for par_dict in self.col_parameters_.values()]
+        return (slice_fixed_width_bytes(mapped, starts, ends, col_indices), len(starts))
+
+    def read_from_body(self, body):
+        """
+            Keeps the table lines of an already downloaded body (e.g. from fetch_urls) of the html file at url.
+        """
+        self.sliced_ = None
         decoded_body = body.decode("utf-8")
         decoded_body = decoded_body.splitlines()[self.firstline_:self.lastline_]
         self.decoded_body_ = decoded_body
 
+    def read_batches(self, batch_size=10000):
+        """
+            Streams the table from url (without cache) and extracts it in batches of batch_size lines. Only one batch of lines is kept in memory at a time, so tables of any length can be read. 
+
+            Yields the cols of each batch (see get_columns), with DATETIME.
+        """
+        with open(url_to_path(self.url_), 'rb') if is_local_url(self.url_) else urllib.request.urlopen(self.url_) as stream:
+            for batch in itertools.batched(iter_table_lines(stream, self.firstline_, self.lastline_), batch_size):
+                self.sliced_ = None
+                self.decoded_body_ = list(batch)
+                self.read_data()
+                self.add_full_timestamp()
+                yield self.get_columns()
+
     def read_data(self):
         """
             Goes through table from url and reads values from given indices. Calls certain fix and cleanup functions.  
         """
-        data = [ [0 for _ in self.col_parameters_] for j in self.decoded_body_ ]
-        
-        for i, line in enumerate(self.decoded_body_):
-            for j, (descr, par_dict) in enumerate(self.col_parameters_.items()):
-                value = line[ par_dict["indices"][0]:par_dict["indices"][1] ]
-                if value.strip() == "":
-                    data[i][j] = None
-                else: 
-                    data[i][j] = value.strip()
-
-        dt = [ (n, 'object') for n in self.col_parameters_] # Nones prevent setting better dtypes for array; done later for pandas dataframe however
-        self.data_ = np.array( [tuple(x) for x in data], dtype = np.dtype(dt))
+        (cols, n_rows) = self.slice_table_cols()
+
+        self.data_ = make_empty_array(n_rows, self.get_output_descr())
+        for descr, col in zip(self.col_parameters_, cols):
+            self.data_[f"{descr}_orig" if descr in PARSED_COLS else descr] = col
         
         self.clean_typos_and_column_spillovers()
 
@@ -97,113 +493,145 @@ class JohnstonarchiveReader():
 
         self.convert_data()
 
+    def slice_table_cols(self):
+        """
+            Cuts the cols out of the table lines: takes the cols already cut out of the mapped file if read with read_from_file, else cuts them out of the decoded lines. Returns the cols and the number of lines.
+        """
+        if self.sliced_ is not None:
+            return self.sliced_
+        col_indices = [par_dict["indices"] for par_dict in self.col_parameters_.values()]
+        return (slice_fixed_width_columns(self.decoded_body_, col_indices), len(self.decoded_body_))
+
+    def get_output_descr(self):
+        """
+            Plans all cols of the extracted data, so that the data is allocated only once and the cleaning stages fill their cols in place. Table cols are 'object' (Nones prevent setting better dtypes for array; done later for pandas dataframe however), cols added by the cleaning stages are typed.
+        """
+        descr = [ (f"{n}_orig" if n in PARSED_COLS else n, 'object') for n in self.col_parameters_]
+        for (n, added_descr) in PARSED_COLS.items():
+            if n in self.col_parameters_:
+                descr += added_descr
+        descr += [('DATETIME', 'datetime64[ns]')]
+        return descr
+
     def convert_data(self):
         """
             Converts read out values to desired datatypes. 
         """
         for (descr, par_dict) in self.col_parameters_.items():
             if par_dict["dtype"] is int or par_dict["dtype"] is float:
-                for i, val in enumerate(self.data_[descr]):
-                    if val is not None:
-                        try:
-                            self.data_[descr][i] = par_dict["dtype"] (val)
-                        except ValueError:
-                            assert False, f"Cannot convert column {descr} to numeric. "
+                values = self.data_[descr]
+                if values.dtype.kind != "O": # cols added by the cleaning stages are typed already
+                    continue
+                given = ~pd.isna(values)
+                try:
+                    converted = pd.to_numeric(values[given])
+                except ValueError:
+                    assert False, f"Cannot convert column {descr} to numeric. "
+                if par_dict["dtype"] is int:
+                    assert (converted == np.round(converted)).all(), f"Cannot convert column {descr} to int. "
+                values[given] = converted.astype(par_dict["dtype"])
 
     def clean_typos_and_column_spillovers(self):
         """
-            Goes through data and fixes general typos and column values that spill over; details in specific comments. 
+            Fixes general typos and column values that spill over; details in specific comments. Works on whole cols: spillovers are found as masks of entries that are not among the expected codes of a col. 
         """
-        for i, d in enumerate(self.data_):
+        data = self.data_
 
-            d["ID"] = int(d["ID"])
-
-            # Enable int for the DAY column
-            if d["DAY"] is None: 
-                d["DAY"] = -1 
-
-            # Fix typo in time col (US table)
-            t = d["TIME"]
-            if t is not None:
-                d["TIME"] = t.replace(';', ':') 
-
-            # Fix some typos for USSR in YIELD col
-            if self.statename_ == "USSR":
-                if (d["ID"] == 158): # removes question mark from col before.
-                    print(f"[INFO] (ID {d["ID"]}): ('{d["YIELD"]}') => ('23') for YIELD.")
-                    d["YIELD"] = 23 
-                elif (d["ID"] == 520): # fixes stray 44 - no idea what it belongs to.
-                    print(f"[INFO] (ID {d["ID"]}): ('{d["YIELD"]}') => ('130') for YIELD.")
-                    d["YIELD"] = 130 
-                elif (d["ID"] == 846): # removes two stray asterisks - no idea what they belong to.  
-                    print(f"[INFO] (ID {d["ID"]}): ('{d["YIELD"]}') => ('85') for YIELD.")
-                    d["YIELD"] = 85 
-
-            # Fix lines that spill over from SHOTNAME to SHOTTYPE
-            s = d["SHOTTYPE"]
-            n = d["SHOTNAME"]
-            if s not in [None, "SS", "S", "X", "*", "?"]:
-                print(f"[INFO] (ID {d["ID"]}): ('{n}' | '{s}') => ('{n+s}' | 'None') for (SHOTNAME | SHOTTYPE)")
-                d["SHOTNAME"] = n + s
-                d["SHOTTYPE"] = None
-
-            # Fix lines that spill over from WARHEAD to SPONSOR
-            s = d["SPONSOR"]
-            w = d["WARHEAD"]
-            if s not in [None, "KB-11", "Ch-70", "KB-11?", "Ch-70?", "LANL", "LLNL", "DOD", "UK", "SNL"]:
-                if w is not None:
-                    print(f"[INFO] (ID {d["ID"]}): ('{w}' | '{s}') => ('{w+s}' | 'None') for (WARHEAD | SPONSOR)")
-                    d["WARHEAD"] = w + s
-                    d["SPONSOR"] = None
-
-            # Fix lines that spill over from SPONSOR to R and N
-            s = d["SPONSOR"]
-            r = d["R"]
-            n = d["N"]
-            if r not in [None, "A", "S", "P", "X"]:
-                if s is not None and n is not None:
-                    print(f"[INFO] (ID {d["ID"]}): ('{s}' | '{r}'| '{n}') => ('{s+r+n}' | 'None' | 'None' )  for (SPONSOR | R | N)")
-                    d["SPONSOR"] = s + r + n
-                    d["R"] = None
-                    d["N"] = None
-
-            # Fix cut off sponsor
-            if s == "KB-11/" or s == "KB-11/Ch-7":
-                d["SPONSOR"] = "KB-11/Ch-70"
-
-            # Fix lines that spill over from VENT to DEVICE
-            dv = d["DEVICE"]
-            v = d["VENT"]
-            if dv not in [None, "IP", "BF", "TN", "FS", "TN?", "FZ", "IC", "IP", "IU", "ND", "SL"]:
-                if v is not None:
-                    print(f"[INFO] (ID {d["ID"]}): ('{v}' | '{dv}') => ('{v+dv}' | 'None') for (VENT | DEVICE)")
-                    d["VENT"] = v + dv
-                    d["DEVICE"] = None 
-
-            # Fix lines that spill over from YD-EST to YIELD-NT
-            y = d["YD-EST"]
-            ynt = d["NT-YD"]
-            if ynt not in [None, "MX", "E", "?", "S", "T", "T*", "S>", "T>", "**", "R? S"]:
-                if y is not None:
-                    print(f"[INFO] (ID {d["ID"]}): ('{y}' | '{ynt}') => ('{y+ynt}' | 'None') for (YD-EST | NT-YD)")
-                    d["YD-EST"] = y + ynt
-                    d["NT-YD"] = None
+        data["ID"] = data["ID"].astype(int)
+
+        # Enable int for the DAY column
+        data["DAY"][pd.isna(data["DAY"])] = -1 
+
+        # Fix typo in time col (US table)
+        t = data["TIME"]
+        given = ~pd.isna(t)
+        if given.any(): # np.strings.replace fails on empty arrays
+            t[given] = np.strings.replace(t[given].astype(str), ';', ':')
+
+        # Fix typos in single table entries given in the corrections
+        corrected_ids = [test_id for (statename, test_id) in self.corrections_ if statename == self.statename_]
+        for i in np.flatnonzero(pd.Series(data["ID"]).isin(corrected_ids)):
+            for (descr, correction) in self.corrections_[(self.statename_, data["ID"][i])].items():
+                if "orig" in correction:
+                    col = f"{descr}_orig" if descr in PARSED_COLS else descr
+                    print(f"[INFO] (ID {data["ID"][i]}): ('{data[col][i]}') => ('{correction["orig"]}') for {descr}.")
+                    data[col][i] = correction["orig"]
+
+        # Fix lines that spill over from SHOTNAME to SHOTTYPE
+        spill = is_unexpected(data["SHOTTYPE"], ["SS", "S", "X", "*", "?"])
+        self.merge_spillover(spill, ["SHOTNAME", "SHOTTYPE"])
+
+        # Fix lines that spill over from WARHEAD to SPONSOR
+        spill = is_unexpected(data["SPONSOR"], ["KB-11", "Ch-70", "KB-11?", "Ch-70?", "LANL", "LLNL", "DOD", "UK", "SNL"]) & ~pd.isna(data["WARHEAD"])
+        self.merge_spillover(spill, ["WARHEAD", "SPONSOR"])
+
+        # Fix cut off sponsor (found before merging spillovers from SPONSOR to R and N)
+        cut_off = pd.Series(data["SPONSOR"]).isin(["KB-11/", "KB-11/Ch-7"]).to_numpy()
+
+        # Fix lines that spill over from SPONSOR to R and N
+        spill = is_unexpected(data["R"], ["A", "S", "P", "X"]) & ~pd.isna(data["SPONSOR"]) & ~pd.isna(data["N"])
+        self.merge_spillover(spill, ["SPONSOR", "R", "N"])
+
+        data["SPONSOR"][cut_off] = "KB-11/Ch-70"
+
+        # Fix lines that spill over from VENT to DEVICE
+        spill = is_unexpected(data["DEVICE"], ["IP", "BF", "TN", "FS", "TN?", "FZ", "IC", "IP", "IU", "ND", "SL"]) & ~pd.isna(data["VENT_orig"])
+        self.merge_spillover(spill, ["VENT_orig", "DEVICE"])
+
+        # Fix lines that spill over from YD-EST to YIELD-NT
+        spill = is_unexpected(data["NT-YD"], ["MX", "E", "?", "S", "T", "T*", "S>", "T>", "**", "R? S"]) & ~pd.isna(data["YD-EST_orig"])
+        self.merge_spillover(spill, ["YD-EST_orig", "NT-YD"])
 
         print("\n ### [INFO] Cleaned general typos and column spillovers. ### \n")
 
+    def merge_spillover(self, spill, cols):
+        """
+            Appends the entries of cols[1:] to the entry of cols[0] and empties them, in the rows selected by the mask spill. Prints each change. 
+        """
+        values = [self.data_[col] for col in cols]
+        merged = values[0][spill]
+        for v in values[1:]:
+            merged = merged + v[spill]
+
+        labels = " | ".join(col.replace("_orig", "") for col in cols)
+        for (i, m) in zip(np.flatnonzero(spill), merged):
+            before = " | ".join(f"'{v[i]}'" for v in values)
+            after = " | ".join([f"'{m}'"] + ["'None'"] * (len(cols) - 1))
+            print(f"[INFO] (ID {self.data_["ID"][i]}): ({before}) => ({after}) for ({labels})")
+
+        values[0][spill] = merged
+        for v in values[1:]:
+            v[spill] = None
+
     def get_data(self):
         return self.data_
 
     def get_dataframe(self):
-        df = pd.DataFrame(self.data_)
+        cols = self.get_columns()
+        return pd.DataFrame({descr: pd.Series(values, dtype=object) if values.dtype.kind == "O" and not isinstance(values.dtype, pd.CategoricalDtype) else values for (descr, values) in cols.items()})
 
-        for j, (descr, par_dict) in enumerate(self.col_parameters_.items()):
-            if par_dict["dtype"] is int or par_dict["dtype"] is float:
-                try:
-                    df[descr] = pd.to_numeric(df[descr])
-                except ValueError:
-                    print(f"Cannot convert col {descr} to numeric. ")
-        return df
+    def get_columns(self):
+        """
+            Returns the data as typed cols (col names as keys, arrays as values): floats with NaN, ints (nullable Int64 if there are empty cells), bools, datetime64, categoricals for the codes in CATEGORICAL_COLS and objects with None for all other strings. Used to collect tables with DataCollector.
+        """
+        cols = {}
+        for descr in self.data_.dtype.names:
+            values = self.data_[descr]
+            dtype = self.col_parameters_[descr]["dtype"] if descr in self.col_parameters_ else None
+
+            if values.dtype.kind != "O":
+                cols[descr] = values.copy()
+            elif dtype is float:
+                cols[descr] = pd.to_numeric(values).astype("float64")
+            elif dtype is int and pd.isna(values).any():
+                cols[descr] = pd.array(values, dtype="Int64")
+            elif dtype is int:
+                cols[descr] = values.astype("int64")
+            elif descr in CATEGORICAL_COLS:
+                cols[descr] = pd.Categorical(values)
+            else:
+                cols[descr] = values.copy()
+        return cols
 
     def print_for_visual_check_of_col_indices(self):
         """
@@ -224,111 +652,69 @@ class JohnstonarchiveReader():
 
     def add_full_timestamp(self):
         """
-            Adds complete timestamp to the data based on given year, month, day, and time.
+            Adds complete timestamp to the data based on given year, month, day, and time. Dates are computed for all rows at once as months and days since 1970, the time of day is appended as ISO string; rows without TIME or DAY (-1) get NaT. A month name not in MONTH_NAMES fails for rows with TIME.
         """
         assert len(self.data_) != 0, "[ERROR] Need to read data first. "
 
-        months = {"JAN":1, "FEB":2, "MAR":3, "APR":4, "MAY": 5, "JUN":6, "JUL":7, "AUG":8, "SEP":9, "OCT":10, "NOV":11, "DEC":12}
+        (year, mon, day, t) = (self.data_["YEAR"].astype(int), self.data_["MON"], self.data_["DAY"].astype(int), self.data_["TIME"])
 
-        datetimes = []
-        for d in self.data_:
-            (y, m, d, t) = (d["YEAR"], d["MON"], d["DAY"], d["TIME"]) 
-            if t is None: 
-                datetimes += [np.datetime64("NaT")]
-            else:
-                datetimes += [ np.datetime64(f"{y}-{months[m]:02}-{d:02} {t}") ]
+        # month lookup: index of the name in MONTH_NAMES (12 if unknown)
+        month = (mon[:, None] == MONTH_NAMES[None, :]).argmax(axis=1) + 12 * ~np.isin(mon, MONTH_NAMES)
+        unknown = ~pd.isna(t) & (month == 12)
+        assert not unknown.any(), f"[ERROR] Unknown month {sorted({str(m) for m in mon[unknown]})} at IDs {self.data_['ID'][unknown].tolist()} (use one of {', '.join(MONTH_NAMES)})."
+        given = ~pd.isna(t) & (day > 0) & (month < 12)
 
-        data_with_datetimes = make_extended_array(self.data_, [('DATETIME', 'object')]) 
-        data_with_datetimes['DATETIME'] = datetimes
+        months = ((year[given] - 1970) * 12 + month[given]).astype("datetime64[M]")
+        dates = months.astype("datetime64[D]") + (day[given] - 1).astype("timedelta64[D]")
+        invalid = dates.astype("datetime64[M]") != months
+        assert not invalid.any(), f"[ERROR] Invalid date at ID {self.data_['ID'][given][invalid][0]}."
 
-        self.data_ = data_with_datetimes
+        datetimes = np.full(len(self.data_), np.datetime64("NaT", "ns"), dtype="datetime64[ns]")
+        datetimes[given] = np.strings.add(np.strings.add(np.datetime_as_string(dates), "T"), t[given].astype(str)).astype("datetime64[ns]")
 
+        self.data_['DATETIME'] = datetimes
+
+
+    def get_value_corrections(self, col_description):
+        """
+            Returns a mask of the rows which have a value correction for col.
+        """
+        ids = [test_id for ((statename, test_id), corrections) in self.corrections_.items() if statename == self.statename_ and "value" in corrections.get(col_description, {})]
+        return pd.Series(self.data_["ID"]).isin(ids).to_numpy()
+
+    def parse_quantity_col(self, col_description):
+        """
+            Parses all entries of col (kept as <col>_orig) with its grammar in QUANTITY_PATTERNS. Entries that do not follow the grammar need a value correction; rows with value corrections are returned as mask and are left empty in the parsed values. 
+        """
+        orig = self.data_[f"{col_description}_orig"]
+        parsed = parse_quantities(orig, QUANTITY_PATTERNS[col_description])
+
+        corrected = self.get_value_corrections(col_description)
+        issues = ~parsed["valid"] & ~corrected
+        assert not issues.any(), f"=========> Issue at ID {self.data_['ID'][issues][0]} and {col_description}: {orig[issues][0]}"
+
+        parsed["value"][corrected] = np.nan
+        parsed["occured"][corrected] = False
+        parsed["remark"][corrected] = None
+        return (parsed, corrected)
+
+    def apply_value_corrections(self, col_description, corrected):
+        for i in np.flatnonzero(corrected):
+            self.apply_value_correction(self.data_[i], col_description)
 
     def add_vent_bool_and_values(self):
         """
-            Parses vent values. VENT_orig saves untouched table entry; VENT given value, VENT_occured whether vent occured (indicated with "V" in table); VENT_value_remark if value indicates limit (indicated with < or >); also specific typo fixes. 
+            Parses vent values. VENT_orig saves untouched table entry; VENT given value, VENT_occured whether vent occured (indicated with "V" in table); VENT_value_remark if value indicates limit (indicated with < or >); values given in the corrections replace parsed values. 
         """
         assert len(self.data_) != 0, "[ERROR] Need to read data first."
 
-        self.data_.dtype.names = [f'{x}_orig' if x in ['VENT'] else x for x in self.data_.dtype.names]
-
-        data_with_vent_info = make_extended_array(self.data_, [
-            ('VENT', 'float'),
-            ('VENT_occured', 'bool'), 
-            ('VENT_value_remark', object)
-            ]) 
-
-        f = 0
-        for i, d in enumerate(data_with_vent_info):
-            vent = d["VENT_orig"]
-            d["VENT_value_remark"] = None
-
-            if vent in ["", None]:
-                d["VENT_occured"] = False
-                d["VENT"] = None
-                continue
-
-            if vent.find("V") > -1: 
-                d["VENT_occured"] = True
-                vent = vent.replace("V", "")
-                if vent.strip() == "":
-                    d["VENT"] = None
-                    continue
-            
-            if self.statename_ == "US" and d["ID"] == 245:
-                d["VENT_occured"] = True
-                d["VENT"] = 1600
-                print(f"[INFO] (ID {d["ID"]}): '{d["VENT"]}' (VENT) => '{d["VENT"]}' (VENT)")
-                continue
-
-            if self.statename_ == "US" and d["ID"] == 265:
-                d["VENT_occured"] = True
-                d["VENT"] = 15e6
-                print(f"[INFO] (ID {d["ID"]}): '{d["VENT"]}' (VENT) => '{d["VENT"]}' (VENT)")
-                continue
-
-            if self.statename_ == "USSR" and d["ID"] == 356:
-                d["VENT_occured"] = True
-                d["VENT"] = 2e6
-                print(f"[INFO] (ID {d["ID"]}): '{d["VENT"]}' (VENT) => '{d["VENT"]}' (VENT)")
-                continue
-        
-            if self.statename_ == "USSR" and d["ID"] == 378:
-                d["VENT_occured"] = True
-                d["VENT"] = 15
-                print(f"[INFO] (ID {d["ID"]}): '{d["VENT"]}' (VENT) => '{d["VENT"]}' (VENT)")
-                continue
-            
-            if self.statename_ == "USSR" and d["ID"] == 431:
-                d["VENT_occured"] = True
-                d["VENT"] = 15
-                print(f"[INFO] (ID {d["ID"]}): '{d["VENT"]}' => '{d["VENT"]}' for VENT")
-                continue
-
-            vent = vent.replace("Ci", "")
-
-            if vent.find("k") > -1:
-                vent = vent.replace("k", "")
-                f = 1000
-            elif vent.find("M") > -1:
-                vent = vent.replace("M", "")
-                f = 1e6
-            else:
-                f = 1
-        
-            if vent.find("<") > -1:
-                vent = vent.replace("<", "")
-                d["VENT_value_remark"] = "<"
-            elif vent.find(">") > -1:
-                vent = vent.replace(">", "")
-                d["VENT_value_remark"] = ">"
-            try: 
-                d["VENT"] = f * float(vent)
-            except ValueError: 
-                assert False, print(f"=========> Issue at ID {d['ID']} and VENT {d['VENT_orig']}")
+        (parsed, corrected) = self.parse_quantity_col("VENT")
+        self.data_["VENT"] = parsed["value"]
+        self.data_["VENT_occured"] = parsed["occured"]
+        self.data_["VENT_value_remark"] = parsed["remark"]
+        self.apply_value_corrections("VENT", corrected)
 
         print("\n ### [INFO] Cleaned VENT data. ### \n")
-        self.data_ = data_with_vent_info
 
 
     def fix_yield_values(self):
@@ -336,35 +722,12 @@ class JohnstonarchiveReader():
             Parses yield values. YIELD_orig saves untouched table entry and YIELD_value_remark if value indicates limit (indicated with < or >) or range.
         """
         assert len(self.data_) != 0, "[ERROR] Need to read data first."
-        
-        if 'YIELD_orig' in self.data_.dtype.names:
-            return 0 
-        
-        self.data_.dtype.names = [f'{x}_orig' if x=='YIELD' else x for x in self.data_.dtype.names]
-
-        data_with_float_yields = make_extended_array(self.data_, [
-            ('YIELD', 'float'), 
-            ('YIELD_value_remark', object), 
-        ]) 
-
-        # Fix yield 
-        for i, d in enumerate(data_with_float_yields):
-            d["YIELD_value_remark"] = None
-            if isinstance(d["YIELD_orig"], float): 
-                d["YIELD"] = d["YIELD_orig"]
-            elif self.statename_ == "USSR" and d["ID"] == 550:
-                d["YIELD"] = 100 # in table: 70-130? - choosing middle
-                d["YIELD_value_remark"] = "mid of range"
-            else:
-                try: 
-                    if d["YIELD_orig"] in [None, ""]:
-                        d["YIELD"] = None
-                    else:
-                        d["YIELD"] = float(d["YIELD_orig"])
-                except ValueError:
-                    assert False, f"=========> ERROR! With ID {d['ID']} and YIELD: {d['YIELD_orig']}"
 
-        self.data_ = data_with_float_yields
+        (parsed, corrected) = self.parse_quantity_col("YIELD")
+        self.data_["YIELD"] = parsed["value"]
+        self.data_["YIELD_value_remark"] = parsed["remark"]
+        self.apply_value_corrections("YIELD", corrected)
+
         self.data_["YIELD_orig"] = self.data_["YIELD_orig"].astype(str) # for hdf-export: avoid mixed datatypes
 
         print("\n ### [INFO] Cleaned YIELD data. ### \n")
@@ -374,99 +737,29 @@ class JohnstonarchiveReader():
         """
             Parses estimated yield values. YD-EST_orig saves untouched table entry and YD-EST_value_remark if value indicates limit (indicated with < or >) or range or uncertainty (indicated with ?).
         """
-
         assert len(self.data_) != 0, "[ERROR] Need to read data first."
 
-        if 'YD-EST_orig' in self.data_.dtype.names:
-            return 0 
-
-        self.data_.dtype.names = [f'{x}_orig' if x=='YD-EST' else x for x in self.data_.dtype.names]
-
-        data_with_float_yields = make_extended_array(self.data_, [
-            ('YD-EST', 'float'),
-            ('YD-EST_value_remark', object)
-        ]) 
-
-        # Fix yield 
-        for i, d in enumerate(data_with_float_yields):
-            d["YD-EST_value_remark"] = None
-            if isinstance(d["YD-EST_orig"], float):
-                d["YD-EST"] = d["YD-EST_orig"]
-            elif self.statename_ == "USSR" and d["ID"] == 158: 
-                    d["YD-EST"] = 23.5 # in table: 20-27kt - choosing middle
-                    d["YD-EST_value_remark"] = "mid of range"
-            elif self.statename_ == "USSR" and d["ID"] == 437: 
-                    d["YD-EST"] = 150 # in table: 150/100 - choosing first number
-                    d["YD-EST_value_remark"] = "?"
-            elif self.statename_ == "USSR" and d["ID"] == 949: 
-                    d["YD-EST"] = 150 # in table: 150/118 - choosing first number
-                    d["YD-EST_value_remark"] = "?"
-            else: 
-                try: 
-                    if d["YD-EST_orig"] in [None, ""] :
-                        d["YD-EST"] = None
-                    else: 
-                        if d["YD-EST_orig"].find("<") > -1:
-                            d["YD-EST_value_remark"] = "<"
-                            d["YD-EST"] = float( (d["YD-EST_orig"]).replace("<", "") )
-                except ValueError:
-                    assert False, f"=========> Issue at ID {d['ID']} and YD-EST: {d['YD-EST_orig']}"
-    
-        self.data_ = data_with_float_yields
+        (parsed, corrected) = self.parse_quantity_col("YD-EST")
+        self.data_["YD-EST"] = parsed["value"]
+        self.data_["YD-EST_value_remark"] = parsed["remark"]
+        self.apply_value_corrections("YD-EST", corrected)
 
         print("\n ### [INFO] Cleaned YD-EST data. ### \n")
 
 
     def add_crat_bool_and_values(self):
         """
-            Parses crater values. CRAT_orig saves untouched table entry; CRAT given value; CRAT_occured whether crater occured (indicated with "C" in table); CRAT_value_remark if there is uncertainty (markerd with ?).
+            Parses crater values. CRAT_orig saves untouched table entry; CRAT given value; CRAT_occured whether crater occured (indicated with "C" in table, unless marked uncertain with ?, or by a crater size > 0); CRAT_value_remark if there is uncertainty (markerd with ?).
         """
         assert len(self.data_) != 0, "[ERROR] Need to read data first."
 
-        if 'CRAT_orig' in self.data_.dtype.names:
-            return 0 
-
-        self.data_.dtype.names = [f'{x}_orig' if x in ['CRAT'] else x for x in self.data_.dtype.names]
-
-        data_with_crat_info = make_extended_array(self.data_, [
-            ('CRAT', 'float'),
-            ('CRAT_occured', 'bool'), 
-            ('CRAT_value_remark', object)
-            ]) 
-
-        for i, d in enumerate(data_with_crat_info):
-            crat = d["CRAT_orig"]
-            d['CRAT_value_remark'] = None
-
-            if crat in ["", None]:
-                d["CRAT_occured"] = False
-                d["CRAT"] = None
-                continue
-
-            if crat.find("C") > -1: 
-                d["CRAT_occured"] = True
-                crat = crat.replace("C", "")
-                if crat.strip() == "":
-                    d["CRAT"] = None
-                    continue
-            
-            if crat.find("?") > -1: 
-                d["CRAT_occured"] = False
-                crat = crat.replace("?", "")
-                if crat.strip() == "":
-                    d["CRAT"] = None
-                    d["CRAT_value_remark"] = '?'
-                    continue
-
-            try: 
-                d["CRAT"] = float(crat)
-                if d["CRAT"] > 0 and d["CRAT"] is not None:
-                    d["CRAT_occured"] = True
-            except ValueError: 
-                assert False, f"=========> Issue at ID {d['ID']} and CRAT = {d['CRAT_orig']}"
+        (parsed, corrected) = self.parse_quantity_col("CRAT")
+        self.data_["CRAT"] = parsed["value"]
+        self.data_["CRAT_occured"] = (parsed["occured"] & (parsed["remark"] != "?")) | (parsed["value"] > 0) # e.g. "C?" is not counted as crater
+        self.data_["CRAT_value_remark"] = parsed["remark"]
+        self.apply_value_corrections("CRAT", corrected)
 
         print("\n ### [INFO] Cleaned crat data. ### \n")
-        self.data_ = data_with_crat_info
 
     def fix_purpose_values(self):
         """
@@ -1,16 +1,70 @@
 #!/usr/bin/env python3.13
 
 import os
+import json
 import yaml
 import pickle 
+import hashlib
 import argparse
+import contextlib
+import concurrent.futures
 
-import pandas as pd
-
+import HttpCache
+import DataCollector
+import DataFrameFile
 import JohnstonarchiveReader
 
 
-def get_data_from_johnstonarchive(urls, lines, indices, statename):
+def read_table(url, lines, indices, statename, body=None, corrections=None, batch_size=None):
+    """
+    Helper function to read and clean one table using the JohnstonarchiveReader. Module level function, so it can also run in a worker process (see main with jobs > 1).
+
+    Parameters
+    ---------
+    url : str
+        url of table to read in
+    lines: (int, int)
+        first and last line of the table in the html file
+    indices, statename, corrections, batch_size:
+        see get_data_from_johnstonarchive
+    body: bytes or None
+        already downloaded raw body of url. If None, url is downloaded when read. Local files (file:// urls or paths) are always memory-mapped instead (see JohnstonarchiveReader.read_from_file).
+
+    Returns
+    -------
+    chunks : list of dict
+        cols of the table (see JohnstonarchiveReader.get_columns); one dict per batch if batch_size is given, else one dict.
+    """
+    reader = JohnstonarchiveReader.JohnstonarchiveReader(statename=statename)
+    reader.set_table_params(url=url, firstline=lines[0], lastline=lines[1])
+
+    for key in indices: 
+        reader.add_col_params(col_description=key, str_index_start=indices[key][0], str_index_end=indices[key][1], col_datatype=indices[key][2])
+
+    if corrections is None:
+        corrections = []
+    for correction in corrections:
+        reader.add_correction(test_id=correction["ID"], col_description=correction["col"], correction={k: v for (k, v) in correction.items() if k not in ["ID", "col"]})
+
+    if batch_size is not None:
+        return list(reader.read_batches(batch_size))
+
+    if JohnstonarchiveReader.is_local_url(url):
+        reader.read_from_file()
+    elif body is None:
+        reader.read_from_url()
+    else:
+        reader.read_from_body(body)
+    reader.read_data()
+
+    reader.add_full_timestamp()
+
+    # reader.print_for_visual_check_of_col_indices()
+
+    return [reader.get_columns()]
+
+
+def get_data_from_johnstonarchive(urls, lines, indices, statename, bodies=None, corrections=None, batch_size=None):
     """
     Helper function to read data from the Johnstonarchive using the JohnstonarchiveReader
     
@@ -24,45 +78,240 @@ def get_data_from_johnstonarchive(urls, lines, indices, statename):
     Nested dictionary. Keys: names/description for each col in table. Values: dicts with keys (1) "indices" (list of (int,int)) corresponding to the table cols (start, end of col)) and (2) "dtypes" (list of types) for reading the table col values. 
     statename: str
         name of the state; used for hardcoded typo fixes. 
+    bodies: dict or None
+        already downloaded raw bodies with urls as keys (see JohnstonarchiveReader.fetch_urls). If None, each url is downloaded when read. Local files (file:// urls or paths) are always memory-mapped instead (see JohnstonarchiveReader.read_from_file).
+    corrections: list of dict or None
+        corrections of single table entries (None for none), each with keys "ID", "col" and (1) "orig" (replaces the table entry) and/or (2) "value", "remark", "occured" (replace the parsed values). 
+    batch_size: int or None
+        If given, each table is streamed from its url and extracted in batches of this many lines (see JohnstonarchiveReader.read_batches); bodies are not used then. 
     
     Returns
     -------
-    data : pd.Dataframe
-        Dataframe with extracted data. 
+    data : DataCollector
+        Collector with extracted data, one chunk per table (or per batch). 
     """
+    if corrections is None:
+        corrections = []
+    data = DataCollector.DataCollector()
     for i, url in enumerate(urls): 
+        for cols in read_table(url, lines[i], indices, statename, None if bodies is None else bodies.get(url), corrections, batch_size):
+            data.add_columns(cols)
 
-        reader = JohnstonarchiveReader.JohnstonarchiveReader(statename=statename)
-        reader.set_table_params(url=url, firstline=lines[i][0], lastline=lines[i][1])
+    return data
 
-        for key in indices: 
-            reader.add_col_params(col_description=key, str_index_start=indices[key][0], str_index_end=indices[key][1], col_datatype=indices[key][2])
 
-        reader.read_from_url()
-        reader.read_data()
+def rebase_url(url, baseurl):
+    """
+    Helper function to point a url from the yaml settings to another location with the same filename, e.g. a local http server or a folder with archived html files. 
+
+    Parameters
+    ---------
+    url : str
+        url as given in yaml settings
+    baseurl : str or None
+        new location of the file, e.g. "http://localhost:8000/". If None, url is returned as is.
+    """
+    if baseurl is None:
+        return url
+    return f"{baseurl.rstrip('/')}/{url.rsplit('/', 1)[-1]}"
+
+
+def get_state_params(settings):
+    """
+    Helper function to get the parameters of the tables of one yaml file. 
+
+    Parameters
+    ---------
+    settings : dict
+        Settings as read from the yaml file.
+
+    Returns
+    -------
+    (statename, urls, table_lines_in_html, indices_dtypes, corrections) : tuple
+        see get_data_from_johnstonarchive
+    """
+    statename = settings["general"]["state"]
+    urls = settings["html_general"]["urls"]
+    table_lines_in_html = settings["html_general"]["table_lines_in_html_file"]
+    indices_dtypes = {key: list(value) for (key, value) in settings["columns"].items()}
+
+    dataypes_map = {"int" : int, "float": float, "str": str }
+    for key in indices_dtypes:
+        indices_dtypes[key][2] = dataypes_map[indices_dtypes[key][2]]
+
+    corrections = settings.get("corrections", [])
+
+    return (statename, urls, table_lines_in_html, indices_dtypes, corrections)
+
+
+def extract_state_data(settings, bodies, batch_size=None):
+    """
+    Helper function to extract the data of one yaml file. 
+
+    Parameters
+    ---------
+    settings : dict
+        Settings as read from the yaml file.
+    bodies : dict or None
+        Raw bodies of the tables with urls as keys.
+    batch_size : int or None
+        If given, tables are streamed in batches of this many lines instead of taken from bodies.
+
+    Returns
+    -------
+    data : DataCollector
+        Collector with extracted data, including the STATE col. 
+    """
+    (statename, urls, table_lines_in_html, indices_dtypes, corrections) = get_state_params(settings)
+
+    print(f"[INFO] Extracting data for {statename}.")
+
+    data = get_data_from_johnstonarchive(urls, table_lines_in_html, indices_dtypes, statename, bodies=bodies, corrections=corrections, batch_size=batch_size)
+    data.set_constant_column("STATE", statename)
+
+    return data
 
-        reader.add_full_timestamp()
 
-        if i==0:
-            data = reader.get_dataframe()
-        else: 
-            data = pd.concat([data, reader.get_dataframe()])
+def submit_state_data(settings, bodies, executor):
+    """
+    Helper function to hand the tables of one yaml file to a process pool, one job per table (counterpart of extract_state_data). Local files are not sent to the workers, they map them themselves.
+
+    Parameters
+    ---------
+    settings : dict
+        Settings as read from the yaml file.
+    bodies : dict
+        Raw bodies of the tables with urls as keys.
+    executor : concurrent.futures.Executor
+        Pool to run the jobs in.
+
+    Returns
+    -------
+    futures : list of concurrent.futures.Future
+        Results of read_table for each table, in the order of the urls.
+    """
+    (statename, urls, table_lines_in_html, indices_dtypes, corrections) = get_state_params(settings)
+
+    print(f"[INFO] Extracting data for {statename}.")
 
-        # reader.print_for_visual_check_of_col_indices()
+    return [executor.submit(read_table, url, lines, indices_dtypes, statename, None if JohnstonarchiveReader.is_local_url(url) else bodies[url], corrections) 
+        for (url, lines) in zip(urls, table_lines_in_html)]
+
+
+def collect_state_data(settings, futures):
+    """
+    Helper function to collect the results of submit_state_data in the order of the tables.
+
+    Returns
+    -------
+    data : DataCollector
+        Collector with extracted data, including the STATE col. 
+    """
+    data = DataCollector.DataCollector()
+    for future in futures:
+        for cols in future.result():
+            data.add_columns(cols)
+    data.set_constant_column("STATE", settings["general"]["state"])
 
     return data
 
 
-def main(yamlfilename, outputfilename):
+def get_body_digest(url, bodies):
+    """
+    Helper function to hash the raw body of a table: local files (file:// urls or paths) are hashed in chunks from disk, as they are not downloaded, other urls are taken from bodies.
+    """
+    if JohnstonarchiveReader.is_local_url(url):
+        with open(JohnstonarchiveReader.url_to_path(url), 'rb') as file:
+            return hashlib.file_digest(file, "sha256").digest()
+    return hashlib.sha256(bodies[url]).digest()
+
+
+def get_fingerprint(settings, bodies):
+    """
+    Helper function to fingerprint everything the extracted data of one yaml file depends on: the raw bodies of its tables, its settings (except for the urls themselves), and the code of the reader, collector and output file writer. 
+
+    Parameters
+    ---------
+    settings : dict
+        Settings as read from the yaml file.
+    bodies : dict
+        Raw bodies of the downloaded tables with urls as keys (local files are read from disk, see get_body_digest).
+
+    Returns
+    -------
+    fingerprint : str
+        sha256 hex digest.
+    """
+    h = hashlib.sha256()
+    for codefile in [JohnstonarchiveReader.__file__, DataCollector.__file__, DataFrameFile.__file__, __file__]:
+        with open(codefile, 'rb') as file:
+            h.update(file.read())
+    h.update(json.dumps([settings["general"], settings["html_general"]["table_lines_in_html_file"], settings["columns"], settings.get("corrections", [])], sort_keys=True).encode("utf-8"))
+    for url in settings["html_general"]["urls"]:
+        h.update(get_body_digest(url, bodies))
+    return h.hexdigest()
+
+
+def load_build_artifact(builddir, name, fingerprint):
+    """
+    Helper function to load the extracted data of one yaml file from an earlier run. 
+
+    Parameters
+    ---------
+    builddir : str or None
+        Folder with the artifacts of earlier runs.
+    name : str
+        Name of the artifact, e.g. "US_tables".
+    fingerprint : str
+        Fingerprint of the current inputs, see get_fingerprint. 
+
+    Returns
+    -------
+    data : DataCollector or None
+        Data of the earlier run, or None if there is none or its fingerprint differs. 
+    """
+    if builddir is None or not os.path.isfile(f"{builddir}/{name}.fingerprint"):
+        return None
+    with open(f"{builddir}/{name}.fingerprint", 'r') as file:
+        if file.read() != fingerprint:
+            return None
+    with open(f"{builddir}/{name}.pkl", 'rb') as file:
+        return pickle.load(file)
+
+
+def save_build_artifact(builddir, name, fingerprint, data):
+    """
+    Helper function to save the extracted data of one yaml file with the fingerprint of its inputs. Counterpart of load_build_artifact. 
+    """
+    os.makedirs(builddir, exist_ok=True)
+    with open(f"{builddir}/{name}.pkl", 'wb') as file:
+        pickle.dump(data, file)
+    with open(f"{builddir}/{name}.fingerprint", 'w') as file:
+        file.write(fingerprint)
+
+
+def main(yamlfilename, outputfilename, baseurl=None, max_in_flight=4, max_per_host=2, min_delay_per_host=0., cache=None, builddir=None, batch_size=None, jobs=1):
     """
     Main function to read data from the johnston nuclear weapon test database. 
 
     Parameters
     ---------
     yamlfilename : str or list of str
-        Settings for data reading. Can be single yaml-file or folder with yaml-files.
+        Settings for data reading. Can be single yaml-file or folder with yaml-files (read in the order of their filenames).
     outputfilename : str 
-        Filename to save the output pickle to.
+        Filename to save the output to: parquet if it ends with .parquet, Arrow if it ends with .feather or .arrow, else pickled pd.Dataframe (see DataFrameFile).
+    baseurl : str or None
+        If given, tables are read from this location instead of the urls in the yaml settings (filenames are kept).
+    max_in_flight, max_per_host, min_delay_per_host : int, int, float
+        Limits for the concurrent download of all tables, see JohnstonarchiveReader.fetch_urls.
+    cache : HttpCache or None
+        If given, tables are taken from this cache and only downloaded if they changed on the server.
+    builddir : str or None
+        If given, the extracted data of each yaml file is kept in this folder and only extracted again if its tables, settings or the reader changed. The output is only rewritten if any of them changed.
+    batch_size : int or None
+        If given, tables are streamed line by line from their urls and extracted in batches of this many lines, so no table is kept in memory as a whole. Tables are then read one after the other, without cache and builddir.
+    jobs : int
+        Number of processes to read the tables in. The output is the same as with one process, as the tables are collected in yaml file and table order.
     """
 
     print("----------------------------------")
@@ -73,48 +322,105 @@ def main(yamlfilename, outputfilename):
     yamlfilename_list = [yamlfilename]
 
     if os.path.isdir(yamlfilename): 
-        yamlfilename_list = [f"{yamlfilename}/{f}" for f in os.listdir(yamlfilename)]
-
-    data = 0
-    for i, yamlfilename in enumerate(yamlfilename_list):
-
-        print(f"[INFO] Extracting data using {yamlfilename}.")
+        yamlfilename_list = [f"{yamlfilename}/{f}" for f in sorted(os.listdir(yamlfilename))]
 
+    settings_list = []
+    for yamlfilename in yamlfilename_list:
         with open(yamlfilename, 'r') as file:
             settings = yaml.safe_load(file)
-
-        statename = settings["general"]["state"]
-        urls = settings["html_general"]["urls"]
-        table_lines_in_html = settings["html_general"]["table_lines_in_html_file"]
-        indices_dtypes = settings["columns"]
-
-        dataypes_map = {"int" : int, "float": float, "str": str }
-        for key in indices_dtypes:
-            indices_dtypes[key][2] = dataypes_map[indices_dtypes[key][2]]
-
-        data_state = get_data_from_johnstonarchive(urls, table_lines_in_html, indices_dtypes, statename)
-        data_state["STATE"] = statename
-
-        if i==0:
-            data = data_state
-        else: 
-            data = pd.concat([data, data_state])
-
-    data.reset_index(drop = True, inplace = True)
-
-    output = open(outputfilename, 'wb')
-    pickle.dump(data, output)
-    output.close()
+        settings["html_general"]["urls"] = [rebase_url(url, baseurl) for url in settings["html_general"]["urls"]]
+        settings_list += [settings]
+
+    for url in [url for settings in settings_list for url in settings["html_general"]["urls"]]:
+        if JohnstonarchiveReader.is_local_url(url):
+            assert os.path.isfile(JohnstonarchiveReader.url_to_path(url)), f"[ERROR] Local table {url} not found (give file:// urls or paths of existing files)."
+
+    if batch_size is not None:
+        assert cache is None and builddir is None, "[ERROR] Streaming tables in batches works without cache and builddir."
+        print(f"[INFO] Streaming tables in batches of {batch_size} lines.")
+        data = DataCollector.DataCollector()
+        for settings in settings_list:
+            data.add_collector(extract_state_data(settings, None, batch_size))
+    else:
+        # local files are memory-mapped when read, not downloaded
+        all_urls = [url for settings in settings_list for url in settings["html_general"]["urls"]]
+        remote_urls = [url for url in all_urls if not JohnstonarchiveReader.is_local_url(url)]
+        print(f"[INFO] Downloading {len(set(remote_urls))} tables.")
+        bodies = JohnstonarchiveReader.fetch_urls(remote_urls, max_in_flight=max_in_flight, max_per_host=max_per_host, min_delay_per_host=min_delay_per_host, cache=cache)
+        if cache is not None:
+            cache.evict()
+
+        fingerprints = [get_fingerprint(settings, bodies) for settings in settings_list]
+        output_fingerprint = hashlib.sha256("".join(fingerprints).encode("utf-8")).hexdigest()
+
+        outputs = {}
+        if builddir is not None and os.path.isfile(f"{builddir}/outputs.json"):
+            with open(f"{builddir}/outputs.json", 'r') as file:
+                outputs = json.load(file)
+        if os.path.isfile(outputfilename) and outputs.get(os.path.abspath(outputfilename)) == output_fingerprint:
+            print(f"[INFO] Nothing changed, kept output at {outputfilename}.")
+            return
+
+        names = [os.path.splitext(os.path.basename(yamlfilename))[0] for yamlfilename in yamlfilename_list]
+        artifacts = [load_build_artifact(builddir, name, fingerprint) for (name, fingerprint) in zip(names, fingerprints)]
+
+        # with several jobs, all tables to extract are handed to the pool first, so that they are read in parallel across yaml files
+        with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) if jobs > 1 else contextlib.nullcontext() as executor:
+            futures = [submit_state_data(settings, bodies, executor) if executor is not None and artifact is None else None for (settings, artifact) in zip(settings_list, artifacts)]
+
+            data = DataCollector.DataCollector()
+            for (yamlfilename, name, settings, fingerprint, data_state, state_futures) in zip(yamlfilename_list, names, settings_list, fingerprints, artifacts, futures):
+
+                if data_state is not None:
+                    print(f"[INFO] Reusing unchanged data of {yamlfilename}.")
+                else:
+                    data_state = extract_state_data(settings, bodies) if state_futures is None else collect_state_data(settings, state_futures)
+                    if builddir is not None:
+                        save_build_artifact(builddir, name, fingerprint, data_state)
+
+                data.add_collector(data_state)
+
+    DataFrameFile.save_dataframe(data.get_dataframe(), outputfilename)
+
+    if builddir is not None:
+        outputs[os.path.abspath(outputfilename)] = output_fingerprint
+        with open(f"{builddir}/outputs.json", 'w') as file:
+            json.dump(outputs, file, indent=1)
 
     print(f"[INFO] Saved extracted output at {outputfilename}.")
 
+
 if __name__ == "__main__":
 
     parser = argparse.ArgumentParser()
 
     parser.add_argument("-i", "--infilename", help="yaml file with settings", required=True)
-    parser.add_argument("-o", "--outfilename", help="pickle with read data", required=True)
+    parser.add_argument("-o", "--outfilename", help="file with read data (.parquet, .feather/.arrow or pickled pd.Dataframe)", required=True)
+    parser.add_argument("-b", "--baseurl", help="read tables from this location instead of the johnston archive, e.g. http://localhost:8000/ or file:///path/to/html/", required=False)
+    parser.add_argument("--max_in_flight", help="maximum number of concurrent downloads", type=int, default=4)
+    parser.add_argument("--max_per_host", help="maximum number of concurrent downloads per host", type=int, default=2)
+    parser.add_argument("--min_delay_per_host", help="minimum time in seconds between two downloads from one host", type=float, default=0.)
+    parser.add_argument("-c", "--cachedir", help="folder to cache downloaded tables in; cached tables are only downloaded again if they changed", required=False)
+    parser.add_argument("--offline", help="only use tables from the cache, never download", action="store_true")
+    parser.add_argument("--cache_fresh_for", help="time in hours in which cached tables are used without asking the server for changes", type=float, default=0.)
+    parser.add_argument("--cache_max_age", help="time in days after which unused tables are removed from the cache", type=float, required=False)
+    parser.add_argument("--cache_max_size", help="maximum size of the cache in MB", type=float, required=False)
+    parser.add_argument("--builddir", help="folder to keep the extracted data per yaml file in; only yaml files whose tables, settings or reader changed are extracted again", required=False)
+    parser.add_argument("--batch_size", help="stream the tables and extract them in batches of this many lines (without cache and builddir)", type=int, required=False)
+    parser.add_argument("-j", "--jobs", help="number of processes to read the tables in", type=int, default=1)
 
     args = parser.parse_args()
 
-    main(args.infilename, args.outfilename)
+    cache = None
+    if args.cachedir is not None:
+        cache = HttpCache.HttpCache(args.cachedir, offline=args.offline, fresh_for=args.cache_fresh_for*3600, 
+            max_age=None if args.cache_max_age is None else args.cache_max_age*86400, 
+            max_size=None if args.cache_max_size is None else int(args.cache_max_size*1e6))
+    elif args.offline:
+        parser.error("--offline requires --cachedir")
+    if args.batch_size is not None and (args.cachedir is not None or args.builddir is not None):
+        parser.error("--batch_size cannot be combined with --cachedir or --builddir")
+    if args.batch_size is not None and args.jobs > 1:
+        parser.error("--batch_size cannot be combined with --jobs")
+
+    main(args.infilename, args.outfilename, args.baseurl, args.max_in_flight, args.max_per_host, args.min_delay_per_host, cache, args.builddir, args.batch_size, args.jobs)
@@ -1,21 +1,27 @@
 
+# Returns true if the output file (first argument) is missing or older than any input file (other arguments)
+outdated() {
+    out=$1; shift
+    [ ! -e "$out" ] && return 0
+    for in in "$@"; do [ "$in" -nt "$out" ] && return 0; done
+    return 1
+}
+
 
 # Run johnstonarchive web to dataframe reading
-python3.13 read_johnston_data.py -i yaml -o ../obtained_data/johnstonarchive_nucleartests_dataframe.pkl 
+python3.13 read_johnston_data.py -i yaml -o ../obtained_data/johnstonarchive_nucleartests_dataframe.parquet -c ../.html_cache --cache_max_age 365 --builddir ../.build
 
 # Append DPRK data 
 cd ../extra/append_data
-python3.13 append_data.py -i ../../obtained_data/johnstonarchive_nucleartests_dataframe.pkl -a DPRK_data.yml -o ../../obtained_data/johnstonarchive_nucleartests_incl_latestDPRK_dataframe.pkl
+outdated ../../obtained_data/johnstonarchive_nucleartests_incl_latestDPRK_dataframe.parquet ../../obtained_data/johnstonarchive_nucleartests_dataframe.parquet DPRK_data.yml append_data.py && python3.13 append_data.py -i ../../obtained_data/johnstonarchive_nucleartests_dataframe.parquet -a DPRK_data.yml -o ../../obtained_data/johnstonarchive_nucleartests_incl_latestDPRK_dataframe.parquet
 cd ../../johnstonsarchive-nucleartest-reader/
 
-# Export data too html, hdf, and csv
+# Export data to html, hdf, and csv; each dataframe is loaded once for all formats
 cd ../extra/export_data
-python3.13 to_html.py -i ../../obtained_data/johnstonarchive_nucleartests_incl_latestDPRK_dataframe.pkl -o ../../obtained_data/johnstonarchive_nucleartests_incl_latestDPRK_htmltable.html 
-python3.13 to_html.py -i ../../obtained_data/johnstonarchive_nucleartests_dataframe.pkl -o ../../obtained_data/johnstonarchive_nucleartests_htmltable.html 
-
- python3.13 to_hdf.py -i ../../obtained_data/johnstonarchive_nucleartests_dataframe.pkl -o ../../obtained_data/johnstonarchive_nucleartests_hdftable.h5 
- python3.13 to_hdf.py -i ../../obtained_data/johnstonarchive_nucleartests_incl_latestDPRK_dataframe.pkl -o ../../obtained_data/johnstonarchive_nucleartests_incl_latestDPRK_hdftable.h5 
-
- python3.13 to_csv.py -i ../../obtained_data/johnstonarchive_nucleartests_dataframe.pkl -o ../../obtained_data/johnstonarchive_nucleartests_csvtable.csv 
- python3.13 to_csv.py -i ../../obtained_data/johnstonarchive_nucleartests_incl_latestDPRK_dataframe.pkl -o ../../obtained_data/johnstonarchive_nucleartests_incl_latestDPRK_csvtable.csv 
- cd ../../johnstonsarchive-nucleartest-reader/
+for name in johnstonarchive_nucleartests johnstonarchive_nucleartests_incl_latestDPRK; do
+    d=../../obtained_data/$name
+    if outdated ${d}_htmltable.html ${d}_dataframe.parquet export.py to_html.py || outdated ${d}_hdftable.h5 ${d}_dataframe.parquet export.py to_hdf.py || outdated ${d}_csvtable.csv ${d}_dataframe.parquet export.py to_csv.py; then
+        python3.13 export.py -i ${d}_dataframe.parquet -o ${d}_htmltable.html ${d}_hdftable.h5 ${d}_csvtable.csv
+    fi
+done
+cd ../../johnstonsarchive-nucleartest-reader/
@@ -1,22 +1,28 @@
 
+# Returns true if the output file (first argument) is missing or older than any input file (other arguments)
+outdated() {
+    out=$1; shift
+    [ ! -e "$out" ] && return 0
+    for in in "$@"; do [ "$in" -nt "$out" ] && return 0; done
+    return 1
+}
+
 
 # Run johnstonarchive web to dataframe reading
 
-python3.13 read_johnston_data.py -i yaml -o ../obtained_data/johnstonarchive_nucleartests_dataframe.pkl 
+python3.13 read_johnston_data.py -i yaml -o ../obtained_data/johnstonarchive_nucleartests_dataframe.parquet -c ../.html_cache --cache_max_age 365 --builddir ../.build
 
 # First, delete DPRK data extracted from Johnson archive, append DPRK data from external
 cd ../extra/append_data
 
-python3.13 append_data.py -i ../../obtained_data/johnstonarchive_nucleartests_dataframe.pkl -a DPRK_data_complete.yml -o ../../obtained_data/johnstonarchive_nucleartests_externalDPRK_dataframe.pkl -d DPRK
+outdated ../../obtained_data/johnstonarchive_nucleartests_externalDPRK_dataframe.parquet ../../obtained_data/johnstonarchive_nucleartests_dataframe.parquet DPRK_data_complete.yml append_data.py && python3.13 append_data.py -i ../../obtained_data/johnstonarchive_nucleartests_dataframe.parquet -a DPRK_data_complete.yml -o ../../obtained_data/johnstonarchive_nucleartests_externalDPRK_dataframe.parquet -d DPRK
 
 cd ../../johnstonsarchive-nucleartest-reader/
 
-# Export data to html, hdf, and csv
+# Export data to html, hdf, and csv; the dataframe is loaded once for all formats
 cd ../extra/export_data
-python3.13 to_html.py -i ../../obtained_data/johnstonarchive_nucleartests_externalDPRK_dataframe.pkl -o ../../obtained_data/johnstonarchive_nucleartests_externalDPRK_dataframe.html 
-
- python3.13 to_hdf.py -i ../../obtained_data/johnstonarchive_nucleartests_externalDPRK_dataframe.pkl -o ../../obtained_data/johnstonarchive_nucleartests_externalDPRK_dataframe.h5 
-
- python3.13 to_csv.py -i ../../obtained_data/johnstonarchive_nucleartests_externalDPRK_dataframe.pkl -o ../../obtained_data/johnstonarchive_nucleartests_externalDPRK_dataframe.csv 
-
- cd ../../johnstonsarchive-nucleartest-reader/
+d=../../obtained_data/johnstonarchive_nucleartests_externalDPRK_dataframe
+if outdated ${d}.html ${d}.parquet export.py to_html.py || outdated ${d}.h5 ${d}.parquet export.py to_hdf.py || outdated ${d}.csv ${d}.parquet export.py to_csv.py; then
+    python3.13 export.py -i ${d}.parquet -o ${d}.html ${d}.h5 ${d}.csv
+fi
+cd ../../johnstonsarchive-nucleartest-reader/
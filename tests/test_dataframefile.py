@@ -0,0 +1,41 @@
+"""
+Tests of DataFrameFile: parquet and Arrow files give back the saved dataframe, or saving fails.
+"""
+
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+REPO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(REPO, "johnstonsarchive-nucleartest-reader"))
+
+import DataFrameFile
+
+EXPECTED = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data/expected_extract.pkl.gz")
+
+
+@pytest.mark.parametrize("extension", [".parquet", ".arrow"])
+def test_round_trip_of_extracted_data(tmp_path, extension):
+    """The extracted data, with a str col as added by add_geolocations, comes back with the same values and dtypes."""
+    df = pd.read_pickle(EXPECTED)
+    df["CC"] = pd.Series(["us"] * (len(df) - 1) + [None], dtype="str")
+    filename = str(tmp_path / f"data{extension}")
+
+    DataFrameFile.save_dataframe(df, filename)
+
+    pd.testing.assert_frame_equal(DataFrameFile.load_dataframe(filename), df)
+    pd.testing.assert_frame_equal(DataFrameFile.load_dataframe(filename, columns=["ID", "DAY", "CC"]), df[["ID", "DAY", "CC"]])
+
+
+@pytest.mark.parametrize("df", [
+    pd.DataFrame({"DAY": pd.Series([9, "09"], dtype=object)}),
+    pd.DataFrame({"coords": pd.Series([(1., 2.), (3., 4.)], dtype=object)}),
+    pd.DataFrame({"ID": [1, 2]}, index=[3, 5]),
+])
+def test_reject_what_can_not_round_trip(tmp_path, df):
+    """Mixed types, nested values and an index other than 0, 1, ... fail instead of being converted."""
+    with pytest.raises(AssertionError, match=r"\[ERROR\]"):
+        DataFrameFile.save_dataframe(df, str(tmp_path / "data.parquet"))
+    assert not os.path.exists(tmp_path / "data.parquet")
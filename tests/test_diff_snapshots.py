@@ -0,0 +1,49 @@
+"""
+Tests of extra/diff_snapshots on the archived html tables.
+"""
+
+import os
+import sys
+import shutil
+
+import pandas as pd
+
+REPO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(REPO, "extra/diff_snapshots"))
+
+import diff_snapshots
+
+HTMLDIR = os.path.join(REPO, "obtained_data/johnston_original_html")
+
+
+def test_diff_state_data_with_missing_ints():
+    """Int64 cols with missing entries (e.g. GZALT) are compared without ambiguous pd.NA."""
+    old = pd.DataFrame({"ID": [1, 2, 3, 4], "GZALT": pd.array([pd.NA, 5, pd.NA, 7], dtype="Int64")})
+    new = pd.DataFrame({"ID": [1, 2, 3, 4], "GZALT": pd.array([pd.NA, 5, 6, pd.NA], dtype="Int64")})
+
+    changes = diff_snapshots.diff_state_data(old, new, ["GZALT"])
+
+    assert list(changes["ID"]) == [3, 4]
+    assert list(changes["CHANGE"]) == ["changed", "changed"]
+    assert changes["OLD"][0] is pd.NA and changes["NEW"][0] == 6
+    assert changes["OLD"][1] == 7 and changes["NEW"][1] is pd.NA
+
+
+def test_changed_row_on_fr_page(tmp_path):
+    """One changed line of FR-ntests1.html gives one change, although FR has Int64 cols with missing entries."""
+    for snapshot in ["2024-01-01", "2024-06-01"]:
+        os.makedirs(tmp_path / "snapshots" / snapshot)
+    shutil.copy(os.path.join(HTMLDIR, "FR-ntests1.html"), tmp_path / "snapshots" / "2024-01-01")
+    with open(os.path.join(HTMLDIR, "FR-ntests1.html"), 'rb') as file:
+        lines = file.read().split(b"\n")
+    assert b"Emeraude" in lines[19]
+    lines[19] = lines[19].replace(b"Emeraude", b"Emeraudx")
+    with open(tmp_path / "snapshots" / "2024-06-01" / "FR-ntests1.html", 'wb') as file:
+        file.write(b"\n".join(lines))
+
+    outfilename = str(tmp_path / "changes.csv")
+    diff_snapshots.main(os.path.join(REPO, "johnstonsarchive-nucleartest-reader/yaml/FR_tables.yml"), str(tmp_path / "snapshots"), outfilename)
+
+    changes = pd.read_csv(outfilename)
+    assert len(changes) == 1
+    assert changes.iloc[0][["STATE", "ID", "CHANGE", "FIELD", "OLD", "NEW"]].tolist() == ["FR", 7, "changed", "SHOTNAME", "Emeraude", "Emeraudx"]
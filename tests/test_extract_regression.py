@@ -0,0 +1,42 @@
+"""
+Regression check of the extraction of the archived html tables against a stored expected frame.
+
+After an intended change of the extracted output, write the new expected frame with
+    python3.13 tests/test_extract_regression.py
+and check its diff before committing it.
+"""
+
+import os
+import sys
+
+import pandas as pd
+
+REPO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(REPO, "johnstonsarchive-nucleartest-reader"))
+
+import read_johnston_data
+
+YAMLDIR = os.path.join(REPO, "johnstonsarchive-nucleartest-reader/yaml")
+HTMLDIR = os.path.join(REPO, "obtained_data/johnston_original_html")
+EXPECTED = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data/expected_extract.pkl.gz")
+
+
+def extract(outfilename):
+    """Extracts all yaml files from the archived html tables."""
+    read_johnston_data.main(YAMLDIR, outfilename, baseurl=HTMLDIR)
+    return pd.read_pickle(outfilename)
+
+
+def test_extract_archived_html(tmp_path):
+    """The archived html tables give the stored expected frame, with the rows in the order of the yaml filenames and the tables."""
+    df = extract(str(tmp_path / "extract.pkl"))
+    expected = pd.read_pickle(EXPECTED)
+    pd.testing.assert_frame_equal(df, expected)
+
+
+if __name__ == "__main__":
+    import tempfile
+    with tempfile.TemporaryDirectory() as tmpdir:
+        df = extract(f"{tmpdir}/extract.pkl")
+    df.to_pickle(EXPECTED)
+    print(f"[INFO] Saved expected frame with {len(df)} rows at {EXPECTED}.")